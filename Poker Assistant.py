@@ -2,548 +2,256 @@
 # AUTHOR: Andrew Smith
 # DATE: 01/31/2024 (last updated)
 # ABOUT: Determine the probability of winning a game of Texas Hold 'Em after entering card and player data. 
+# The card, evaluator and simulation functions are in the montex package (import montex, or python -m montex for many spots at once).
 
-import random
-import numpy as np
+import sys
 import time
+from concurrent.futures import ProcessPoolExecutor
+
+from montex import simulation
+from montex.cache import loadCache, saveCache
+from montex.cards import str_to_card, card_to_str
+from montex.engine import streetStream
+from montex.evaluator import handRank, rank_to_text
+from montex.outs import nextCards, OUTS_RUNS
+from montex.preflop import buildPreflopTable, TABLE_RUNS
+from montex.profiler import enableProfile, profileStreet, profileSummary, saveProfile
+from montex.simulation import confidenceHalfWidth, potEquity, ignoreInterrupt
 
-# 0. Input Simulation Variables
-# introduction text
-print("MONTEX - SIMULATED POKER ASSISTANT")
-print("Written by Andrew Smith")
-print("Version 1.0 Copyright 2024 \n")
+# initialize variables
+runs = 2000000 # maximum number of simulations to perform per street
+precision = 0.0025 # stop simulating once the 95% confidence interval of the win percentage is within +/- this
+max_time = 2.0 # stop simulating after this many seconds
+sampling = "plain" # how simulated hands are dealt: "plain", "stratified", "antithetic" or "halton" (python -m montex.sampling measures the gain)
+workers = simulation.WORKERS # number of processes to share the simulations between
+progress_time = 0.1 # seconds between updates of the running win percentage while simulating, Ctrl+C keeps the result so far
+show_outs = True # after the flop and turn, show the cards that improve the player's hand and the pot equity after each next card
+profile = False # time each phase of the simulation by street and show a summary at the end
+PROFILE_FILE = None # file to also write the profile to as JSON, ex: "montex_profile.json"
+CACHE_FILE = None # file to keep cached results in between sessions, ex: "montex_cache.json" (None = memory only)
 
-# input parameters
-print("Input Parameters")
-ops = int(input("> Number of Opponents: ")) # number of opponents playing against
-print("")
-print("Enter Pocket Cards")
-p_card_1 = str(input("> Pocket Card #1: ")) # first pocket card
-p_card_2 = str(input("> Pocket Cards #2: ")) # second pocket card
 
-# initialize variables
-runs = 1000 # default number of simulations to perform 
-wins = 0 # number of winning hands
-deck_org = ['2C', '3C', '4C', '5C', '6C', '7C', '8C', '9C', '10C', '11C', '12C', '13C', '14C', '2D', '3D', '4D', '5D', '6D', '7D', '8D', '9D', '10D', '11D', '12D', '13D', '14D', '2H', '3H', '4H', '5H', '6H', '7H', '8H', '9H', '10H', '11H', '12H', '13H', '14H', '2S', '3S', '4S', '5S', '6S', '7S', '8S', '9S', '10S', '11S', '12S', '13S', '14S'] # default deck of cards, original deck to be copied in simulations
-
-
-
-# 1. Create Player Hand
-def str_to_card(txt):
-    # Convert string data to player card information
-    # 2-10 = #, 11 = Jack (J), 12 = Queen (Q), 13 = King (K), 14 = Ace (A) || Clubs (C), Diamonds (D), Hearts (H), Spades (S)
-    suit = txt[-1].upper() # last character of entry -> convert to uppercase
-    value = txt[:-1].upper() # remaining characters are card value -> convert to uppercase if possible
-    # convert face card values to numbers
-    if value == "J":
-        value = 11
-    elif value == "Q":
-        value = 12
-    elif value == "K":
-        value = 13
-    elif value == "A":
-        value = 14
-    return str(value)+str(suit)
-    
-p_cards_org = [str_to_card(p_card_1), str_to_card(p_card_2)] # define player hand (original), convert input strings to card values. set as original as simulation will copy hand multiple times
-# remove cards from the deck
-deck_org.remove(p_cards_org[0])
-deck_org.remove(p_cards_org[1])
-     
-     
-     
-# 2. Global Functions
-# Convert hand to card values and suits
-def cardValues(hand):
-    # Take array of card values and convert into array of numerical values without suits
-    # OUTPUT: array of ints, O(nlogn)
-    num_hand = []
-    for i in range(len(hand)): # go through each card
-        num_hand.append(int(hand[i][:-1])) # remove suit, convert to integer
-    num_hand.sort() # arrange in order
-    return num_hand
-
-
-def cardSuits(hand):
-    # Take array of card values and convert into array of suits
-    # OUTPUT: array of string characters, O(nlogn)
-    suit_hand = []
-    for i in range(len(hand)): # go through each card
-        suit_hand.append(hand[i][-1]) # get last character for suit name
-    suit_hand.sort() # arrange in order
-    return suit_hand
-
-
-# Check each rank of poker hands
-def highCard(hand):
-    # Return highest card value of a hand
-    # OUTPUT: Card Value, O(n)
-    hand_vals = cardValues(hand)
-    return max(hand_vals)
-
-
-def pairs(hand):
-    # Check duplicate cards and return pair type and highest pair value
-    # OUTPUT: [True/False, Type, Card Value], O(nlogn)
-    hand_vals = cardValues(hand)
-    
-    # get card frequency
-    freq = {i:hand_vals.count(i) for i in hand_vals} # create dictionary with frequency of each card occurence
-    unique = list(freq.keys()) # unique cards (key list)
-    counts = list(freq.values()) # number of occurences (value list)
-    
-    # reverse list to allow for doublets and triplet pairs to be sorted
-    unique_two = unique.copy()
-    unique_two.reverse()
-    counts_two = counts.copy()
-    counts_two.reverse()
-    
-    # sort list to find highest and second highest frequency card
-    counts_sorted = counts.copy()
-    counts_sorted.sort() # sorted frequency list -> UPDATE to reduce time complexity
-    
-    # determine pair type based on frequency list
-    first = counts_sorted[-1] # most frequent card
-    second = counts_sorted[-2] # 2nd most frequent card
-        
-    if first == 4:
-        p = counts.index(4) # index position of card
-        return [True, "four of a kind", unique[p] ]
-    
-    elif first == 3:
-        p = counts.index(3) # index position of card
-        if second == 1:
-            return [True, "three of a kind", unique[p] ]
-        elif second == 2:
-            return [True, "full house", unique[p] ]
-        elif second == 3:
-            q = counts_two.index(3) # reverse list, q = index of second triplet card
-            if unique_two[q] > unique[p]: # ex: AAABBBC, report B if B>A
-                return [True, "full house", unique_two[q] ]
-            else: # ex: AAABBC report A if A>B
-                return [True, "full house", unique[p] ]
-                
-    elif first == 2:
-        p = counts.index(2) # index position of card
-        if second == 1: 
-            return [True, "one pair", unique[p] ]
-        elif second == 2:
-            q = counts_two.index(2) # reverse list, q = index of second doublet card
-            if(unique_two[q] > unique[p]): # ex: AABBCDE, report B if B>A
-                return [True, "two pair", unique_two[q] ]
-            else: # ex: AABBCDE report A if A>B
-                return [True, "two pair", unique[p] ]
-        
-    else: # no pairs found
-        return [False, "none", 0]
-
-
-def isStraight(hand):
-    # Determine whether a hand has a straight in it and if so, returns highest straight value
-    # OUTPUT: [True/False, Card Value], O(n)
-
-    cv = cardValues(hand) # get value of each card and sort
-    cv = np.unique(cv) # remove duplicates 
-   
-    for i in range(len(cv)-1, len(cv)-4, -1): # check each straight starting point (start from end to get highest straight card value in case 6 are in a row)
-        if cv[i] == cv[i-1] + 1 and cv[i-1] == cv[i-2] + 1 and cv[i-2] == cv[i-3] + 1 and cv[i-3] == cv[i-4] + 1:
-            return [True, cv[i]]
-        
-    return [False, 0]
- 
-
-def isFlush(hand):
-    # Determine whether a hand has a flush in it and if so, return highest flush value
-    # OUTPUT: [True/False, Suit, Card Value], O(n)
-    
-    hand_suits = cardSuits(hand)
-    
-    # get suit frequency
-    freq = {i:hand_suits.count(i) for i in hand_suits} # create dictionary with frequency of each card occurence
-    unique = list(freq.keys()) # unique suits (key list)
-    counts = list(freq.values()) # number of occurences (value list)
-    
-    if max(counts) >= 5:
-        p = counts.index(max(counts)) # which suit has 5 or more cards
-        suit = unique[p] # flush suit
-        max_card = 0 # value of highest card in flush suit
-        for i in hand:
-            if i[-1] == suit and int(i[:-1]) > max_card: # if card has flush suit and greater than current max
-                max_card = int(i[:-1])               
-        return [True, suit, max_card]
-    
-    else:
-        return [False, 0, 0]
-    
-    return [False, 0, 0] # return if havent before
-    
 
-def straightFlush(hand):
-    # Check if a hand has a straight flush and if so, returns highest card value
-    # OUTPUT: [True/False, Card Value], O(n)
-    
-    flush = isFlush(hand) # get return array of flush check
-    suit = "" # flush suit
-    sf_cards = [] # cards part of the straight flush
-    
-    if flush[0] == True: # if the hand is a flush
-        suit = flush[1]
-        
-        # get cards only in flush suit
-        for i in hand: # loop over each card
-            if i[-1] == suit:
-                sf_cards.append(i) # add card to straight flush cards
-                
-        straight = isStraight(sf_cards) # check if these cards are straight and get highest card
-        if straight[0] == True: # if straight, then this is a straight flush
-            return [True, straight[1]] # return top card
-        else: # if not a straight, return false
-            return [False, 0]
-        
-    else: # if not a flush, return false
-        return [False, 0]
-    
-    return [False, 0] # return if havent before
-        
-    
-def handRank(hand):
-    # Get the ranking of the hand based on all the different poker hands possible
-    # 1 = high card, 2 = one pair, 3 = two pair, 4 = three of a kind, 5 = straight, 6 = flush, 7 = full house, 8 = four of a kind, 9 = straight flush, 10 = royal flush
-    # OUTPUT: [Hand Rank, Card Value], O(nlogn)
-    
-    score = [1, highCard(hand)] # [hand rank, card value], high card is set as default
-        
-    pair = pairs(hand) # check pairs
-    if pair[0] == True: # pair is present
-        if pair[1] == "one pair":
-            score = [2, pair[2]]
-        elif pair[1] == "two pair":
-            score = [3, pair[2]]
-        elif pair[1] == "three of a kind":
-            score = [4, pair[2]]
-        elif pair[1] == "full house":
-            score = [7, pair[2]]
-            return score
-        elif pair[1] == "four of a kind":
-            score = [8, pair[2]]
-            return score
-    
-    straight = isStraight(hand) # checks straights
-    if straight[0] == True: # straight is present
-        score = [5, straight[1]]
-    
-    flush = isFlush(hand) # checks flush
-    if flush[0] == True: # flush is present
-        straight_flush = straightFlush(hand) # check if straight flush
-        if straight_flush[0] == True: # straight flush
-            if straight_flush[1] == 14: # royal flush
-                score = [10, 14]
-            else: # straight flush
-                score = [9, straight_flush[1]]
-        else: # flush
-            score = [6, flush[2]] 
-    
-    return score
-    
-    
-def rank_to_text(rank):
-    # Convert hand rank number to name type
-    # OUTPUT: string
-    val = int(rank)
-    rank_names = ["High Card", "One Pair", "Two Pair", "Three of a Kind", "Straight", "Flush", "Full House", "Four of a Kind", "Straight Flush", "Royal Flush"]
-    return rank_names[val - 1]
-
-
-def win_results_display(num_wins, num_opponents):
-    # Display win liklihood and compare it to random liklihood to show loss/gain of odds
-    win_pct = wins / runs # win percentage -> # wins / # hands
-    exp_pct = 1 / (ops+1) # expected number of win percentage
+# 2. Global Functions
+def pct(x):
+    # Format a fraction as a percentage
+    # OUTPUT: string, ex: 0.25 -> "25.000%"
+    return "{:.3f}%".format(100*x)
+
+
+def street_results(p_cards, m_cards, deck, num_opponents, pool):
+    # Get the results of the current street, showing the running win percentage in place while the simulation improves it
+    # Ctrl+C stops the simulation early and keeps the results so far
+    # OUTPUT: [# wins, # ties, # hands, True if exact, shares, categories] -> see streetResults
+    live = sys.stdout.isatty() # only redraw the line on a terminal
+    last_time = 0
+    results = None
+    try:
+        for results in streetStream(p_cards, m_cards, deck, num_opponents, runs, pool=pool, precision=precision, max_time=max_time, sampling=sampling):
+            if live and not results[3] and time.perf_counter() - last_time >= progress_time:
+                last_time = time.perf_counter()
+                line = "Simulating: " + pct(results[0] / results[2]) + " +/- " + pct(confidenceHalfWidth(results[0], results[2])) + " [" + str(results[2]) + " hands] (Ctrl+C to stop)"
+                print("\r" + line, end="", flush=True)
+    except KeyboardInterrupt:
+        if results is None: # nothing to keep yet
+            raise
+    if live and last_time:
+        print("\r" + " "*len(line) + "\r", end="") # clear the running line
+    return results
+
+
+def win_results_display(results, num_opponents):
+    # Display win liklihood and compare it to random liklihood to show loss/gain of odds, with the 95% confidence interval of simulated results
+    # then ties by number of players splitting the pot, losses, share of the pot expected and the player's final hand
+    # results = [# wins, # ties, # hands, True if exact, shares, categories] from streetResults
+    num_wins, num_ties, num_hands, exact, shares, categories = results
+    win_pct = num_wins / num_hands # win percentage -> # wins / # hands
+    exp_pct = 1 / (num_opponents+1) # expected number of win percentage
     gain_pct = win_pct - exp_pct # gained percentage is the difference
+    if exact: # every possible deal was checked
+        accuracy = " [exact]"
+    else:
+        accuracy = " +/- " + pct(confidenceHalfWidth(num_wins, num_hands)) + " [" + str(num_hands) + " hands]"
     if(gain_pct > 0):
-        print("Winning Percentage: " + str("{:.3f}%".format( 100*win_pct )) + " (+" + str("{:.3f}%".format(100*gain_pct) ) + ")" ) # add positive sign
+        print("Winning Percentage: " + pct(win_pct) + " (+" + pct(gain_pct) + ")" + accuracy ) # add positive sign
     else:
-        print("Winning Percentage: " + str("{:.3f}%".format( 100*win_pct )) + " (" + str("{:.3f}%".format(100*gain_pct) ) + ")" ) # negative value
+        print("Winning Percentage: " + pct(win_pct) + " (" + pct(gain_pct) + ")" + accuracy ) # negative value
+    
+    # ties and losses
+    splits = [str(k) + "-way " + pct(shares[k] / num_hands) for k in range(2, len(shares)) if shares[k] > 0]
+    tie_text = "Tie Percentage: " + pct(num_ties / num_hands)
+    if splits:
+        tie_text += " (" + ", ".join(splits) + ")"
+    print(tie_text + " | Losing Percentage: " + pct((num_hands - num_wins - num_ties) / num_hands))
+    
+    # pot equity -> wins + each split pot divided between the players sharing it, fair share is 1 / # players
+    equity = potEquity(num_wins, shares, num_hands)
+    sign = "+" if equity - exp_pct > 0 else ""
+    print("Pot Equity: " + pct(equity) + " (" + sign + pct(equity - exp_pct) + ")")
+    print("Final Hand: " + ", ".join(rank_to_text(c) + " " + pct(categories[c] / num_hands) for c in range(1, 11) if categories[c] > 0))
+    return
+
+
+def outs_display(cards, hand_rank, equity):
+    # Display the outs -> next cards that improve the player's hand rank and raise the pot equity, with the pot equity once each is dealt
+    # then how many next cards raise / lower the pot equity and the best and worst of them
+    # cards = [card, hand rank, win rate, pot equity, # hands] for each next card from nextCards, equity = pot equity now
+    improving = [o for o in cards if o[1] > hand_rank and o[3] > equity]
+    print("Outs: " + str(len(improving)) + " of " + str(len(cards)) + " next cards improve your hand")
+    for card, rank, win, pot, n in improving:
+        print("  " + card_to_str(card) + " -> " + rank_to_text(rank) + ", Pot Equity " + pct(pot) + " (+" + pct(pot - equity) + ")")
+    better = sum(1 for o in cards if o[3] > equity)
+    print("Next Card: " + str(better) + " raise / " + str(len(cards) - better) + " lower your pot equity, best " + card_to_str(cards[0][0]) + " " + pct(cards[0][3])
+          + ", worst " + card_to_str(cards[-1][0]) + " " + pct(cards[-1][3]))
     return
     
    
     
-# 3. Pre-Flop Monte Carlo Simulation
-p_cards = p_cards_org # copy player cards
-
-for i in range(runs):
-    # Reset and Initialize Variables
-    p_hand = [] # player hand (all 7)
-    o_cards = [] # opponents' cards
-    o_hands = [] # opponent hands
-    m_cards = [] # middle (community)
-    
-    # Deal Cards
-    deck = deck_org # copy deck
-    random.shuffle(deck) # shuffle deck
-    # set opponent hands (individual)
-    for j in range(ops):
-        o_cards.append( [ deck[0], deck[1] ] ) # give top two cards
-        deck = deck[2:] # remove dealt cards
-    # deal middle cards (community)
-    m_cards = deck[0:5]
-    deck = deck[5:] # remove dealt cards
-    
-    # Define Hands
-    # player hand (7 cards)
-    p_hand = p_cards + m_cards # add middle cards to hand
-    # opponent hands (7 cards each)
-    for j in range(ops):
-        o_hands.append( o_cards[j] + m_cards ) # add middle cards to each opponents hand
-    
-    # Evaluate Winning Hands
-    # get hand rank of each player
-    p_score = handRank(p_hand) # player scores -> [hand rank, card value]
-    o_scores = [] # opponent scores
-    for j in range(ops):
-        o_scores.append( handRank(o_hands[j]) ) # get score of each opponent hand
-    # check if win
-    for j in range(ops):
-        if p_score[0] >= o_scores[j][0]: # win/tie
-            if p_score[0] == o_scores[j][0]: # player tied with opponent
-                if p_score[1] > o_scores[j][1]: # player won
-                    pass # player beat opponent, check next opponent
-                elif p_score[1] < o_scores[j][1]: # player lost
-                    break # exit for loop if player loses
-                else: # tie 
-                    break # count ties as a loss, go to next opponent
-            else:
-                pass # if player does not lose, keep checking other opponents
-        else: # player lost
-            break # exit for loop if player loses
-        
-        if j == ops-1: # player has beaten all opponent hands
-            wins += 1 # add to win count
-    
-    
-    
-# 4. Calculate Pre-Flop Results
-print("")
-win_results_display(wins, ops)
-
-
-
-# 5. Enter Flop Cards
-print("")
-print("Enter Flop Cards")
-flop_card_1 = str(input("> Flop Card #1: ")) # first flop card
-flop_card_2 = str(input("> Flop Card #2: ")) # second flop card
-flop_card_3 = str(input("> Flop Card #3: ")) # third flop card
-flop_cards = [str_to_card(flop_card_1), str_to_card(flop_card_2), str_to_card(flop_card_3)] # save flop cards
-# remove flop cards from deck
-deck_org.remove(flop_cards[0])
-deck_org.remove(flop_cards[1])
-deck_org.remove(flop_cards[2])
-
-# display current player hand
-current_hand = p_cards_org + flop_cards # create current player hand
-hand_rank_temp = handRank(current_hand)[0] # current hand rank of player
-print("")
-print("Current Hand: " + str(rank_to_text(hand_rank_temp)) )
-
-
-
-# 6. Flop Monte-Carlo Simulation
-p_cards = p_cards_org # copy player cards
-wins = 0 # reset win counter
-
-for i in range(runs):
-    # Reset and Initialize Variables
-    p_hand = [] # player hand (all 7)
-    o_cards = [] # opponents' cards
-    o_hands = [] # opponent hands
-    m_cards = [] # middle (community)
-    
-    # Deal Cards
-    deck = deck_org # copy deck
-    random.shuffle(deck) # shuffle deck
-    # set opponent hands (individual)
-    for j in range(ops):
-        o_cards.append( [ deck[0], deck[1] ] ) # give top two cards
-        deck = deck[2:] # remove dealt cards
-    # deal middle cards (community)
-    m_cards = flop_cards + deck[0:2] # use known cards + 2 random cards for turn and river
-    deck = deck[2:] # remove dealt cards
-    
-    # Define Hands
-    # player hand (7 cards)
-    p_hand = p_cards + m_cards # add middle cards to hand
-    # opponent hands (7 cards each)
-    for j in range(ops):
-        o_hands.append( o_cards[j] + m_cards ) # add middle cards to each opponents hand
-    
-    # Evaluate Winning Hands
-    # get hand rank of each player
-    p_score = handRank(p_hand) # player scores -> [hand rank, card value]
-    o_scores = [] # opponent scores
-    for j in range(ops):
-        o_scores.append( handRank(o_hands[j]) ) # get score of each opponent hand
-    # check if win
-    for j in range(ops):
-        if p_score[0] >= o_scores[j][0]: # win/tie
-            if p_score[0] == o_scores[j][0]: # player tied with opponent
-                if p_score[1] > o_scores[j][1]: # player won
-                    pass # player beat opponent, check next opponent
-                elif p_score[1] < o_scores[j][1]: # player lost
-                    break # exit for loop if player loses
-                else: # tie 
-                    break # count ties as a loss, go to next opponent
-            else:
-                pass # if player does not lose, keep checking other opponents
-        else: # player lost
-            break # exit for loop if player loses
-        
-        if j == ops-1: # player has beaten all opponent hands
-            wins += 1 # add to win count
-    
-    
-    
-# 7. Calculate Flop Results
-win_results_display(wins, ops)
+def main():
+    # Run the interactive assistant, one street at a time
+    # 0. Input Simulation Variables
+    # introduction text
+    print("MONTEX - SIMULATED POKER ASSISTANT")
+    print("Written by Andrew Smith")
+    print("Version 1.0 Copyright 2024 \n")
 
+    # input parameters
+    print("Input Parameters")
+    ops = int(input("> Number of Opponents: ")) # number of opponents playing against
+    print("")
+    print("Enter Pocket Cards")
+    p_card_1 = str(input("> Pocket Card #1: ")) # first pocket card
+    p_card_2 = str(input("> Pocket Cards #2: ")) # second pocket card
+    deck_org = list(range(52)) # default deck of cards as integer card codes (see str_to_card), original deck to be copied in simulations
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=ignoreInterrupt) if workers > 1 else None # worker processes, reused for every street
+    if CACHE_FILE is not None:
+        loadCache(CACHE_FILE) # results of earlier sessions
+    enableProfile(profile)
 
 
-# 8. Enter Turn Card
-print("")
-print("Enter Turn Card")
-turn_card = str_to_card( str(input("> Turn Card: ")) ) # turn card -> convert to card
-# remove turn card from deck
-deck_org.remove(turn_card)
 
-# display current player hand
-current_hand = p_cards_org + flop_cards + [turn_card] # create current player hand
-hand_rank_temp = handRank(current_hand)[0] # current hand rank of player
-print("")
-print("Current Hand: " + str(rank_to_text(hand_rank_temp)) )
+    # 1. Create Player Hand
+    p_cards_org = [str_to_card(p_card_1), str_to_card(p_card_2)] # define player hand (original), convert input strings to card values. set as original as simulation will copy hand multiple times
+    # remove cards from the deck
+    deck_org.remove(p_cards_org[0])
+    deck_org.remove(p_cards_org[1])
 
 
 
-# 9. Turn Monte-Carlo Simulation
-p_cards = p_cards_org # copy player cards
-wins = 0 # reset win counter
+    # 3. Pre-Flop Monte Carlo Simulation
+    profileStreet("preflop")
+    results = street_results(p_cards_org, [], deck_org, ops, pool) # [wins, ties, hands, exact, shares, categories], split pots count towards pot equity
 
-for i in range(runs):
-    # Reset and Initialize Variables
-    p_hand = [] # player hand (all 7)
-    o_cards = [] # opponents' cards
-    o_hands = [] # opponent hands
-    m_cards = [] # middle (community)
-    
-    # Deal Cards
-    deck = deck_org # copy deck
-    random.shuffle(deck) # shuffle deck
-    # set opponent hands (individual)
-    for j in range(ops):
-        o_cards.append( [ deck[0], deck[1] ] ) # give top two cards
-        deck = deck[2:] # remove dealt cards
-    # deal middle cards (community)
-    m_cards = flop_cards + [turn_card] + [deck[0]]
-    deck = deck[1:] # remove dealt cards
-    
-    # Define Hands
-    # player hand (7 cards)
-    p_hand = p_cards + m_cards # add middle cards to hand
-    # opponent hands (7 cards each)
-    for j in range(ops):
-        o_hands.append( o_cards[j] + m_cards ) # add middle cards to each opponents hand
-    
-    # Evaluate Winning Hands
-    # get hand rank of each player
-    p_score = handRank(p_hand) # player scores -> [hand rank, card value]
-    o_scores = [] # opponent scores
-    for j in range(ops):
-        o_scores.append( handRank(o_hands[j]) ) # get score of each opponent hand
-    # check if win
-    for j in range(ops):
-        if p_score[0] >= o_scores[j][0]: # win/tie
-            if p_score[0] == o_scores[j][0]: # player tied with opponent
-                if p_score[1] > o_scores[j][1]: # player won
-                    pass # player beat opponent, check next opponent
-                elif p_score[1] < o_scores[j][1]: # player lost
-                    break # exit for loop if player loses
-                else: # tie 
-                    break # count ties as a loss, go to next opponent
-            else:
-                pass # if player does not lose, keep checking other opponents
-        else: # player lost
-            break # exit for loop if player loses
-        
-        if j == ops-1: # player has beaten all opponent hands
-            wins += 1 # add to win count
-    
-    
-    
-# 10. Calculate Turn Results
-win_results_display(wins, ops)
 
 
+    # 4. Calculate Pre-Flop Results
+    print("")
+    win_results_display(results, ops)
 
-# 11. Enter River Card
-print("")
-print("Enter River Card")
-river_card = str_to_card( str(input("> River Card: ")) ) # river card -> convert to card
-# remove river card from deck
-deck_org.remove(river_card)
 
-# display current player hand
-player_hand = p_cards_org + flop_cards + [turn_card,river_card] # create final player hand
-hand_rank_temp = handRank(player_hand)[0] # hand rank of player
-print("")
-print("Current Hand: " + str(rank_to_text(hand_rank_temp)) )
 
+    # 5. Enter Flop Cards
+    print("")
+    print("Enter Flop Cards")
+    flop_card_1 = str(input("> Flop Card #1: ")) # first flop card
+    flop_card_2 = str(input("> Flop Card #2: ")) # second flop card
+    flop_card_3 = str(input("> Flop Card #3: ")) # third flop card
+    flop_cards = [str_to_card(flop_card_1), str_to_card(flop_card_2), str_to_card(flop_card_3)] # save flop cards
+    # remove flop cards from deck
+    deck_org.remove(flop_cards[0])
+    deck_org.remove(flop_cards[1])
+    deck_org.remove(flop_cards[2])
 
+    # display current player hand
+    current_hand = p_cards_org + flop_cards # create current player hand
+    hand_rank_temp = handRank(current_hand)[0] # current hand rank of player
+    print("")
+    print("Current Hand: " + str(rank_to_text(hand_rank_temp)) )
 
-# 12. River Monte-Carlo Simulation
-wins = 0 # reset win counter
-m_cards = flop_cards + [turn_card,river_card] # define middle cards
-p_score = handRank(player_hand) # automatically define player hand and score
 
-for i in range(runs):
-    # Reset and Initialize Variables
-    o_cards = [] # opponents' cards
-    o_hands = [] # opponent hands
-    
-    # Deal Cards
-    deck = deck_org # copy deck
-    random.shuffle(deck) # shuffle deck
-    # set opponent hands (individual)
-    for j in range(ops):
-        o_cards.append( [ deck[0], deck[1] ] ) # give top two cards
-        deck = deck[2:] # remove dealt cards
-    
-    # Define Hands
-    # opponent hands (7 cards each)
-    for j in range(ops):
-        o_hands.append( o_cards[j] + m_cards ) # add middle cards to each opponents hand
-    
-    # Evaluate Winning Hands
-    # get hand rank of each player
-    o_scores = [] # opponent scores
-    for j in range(ops):
-        o_scores.append( handRank(o_hands[j]) ) # get score of each opponent hand
-    # check if win
-    for j in range(ops):
-        if p_score[0] >= o_scores[j][0]: # win/tie
-            if p_score[0] == o_scores[j][0]: # player tied with opponent
-                if p_score[1] > o_scores[j][1]: # player won
-                    pass # player beat opponent, check next opponent
-                elif p_score[1] < o_scores[j][1]: # player lost
-                    break # exit for loop if player loses
-                else: # tie 
-                    break # count ties as a loss, go to next opponent
-            else:
-                pass # if player does not lose, keep checking other opponents
-        else: # player lost
-            break # exit for loop if player loses
-        
-        if j == ops-1: # player has beaten all opponent hands
-            wins += 1 # add to win count
-    
-    
-    
-# 13. Calculate River Results
-win_results_display(wins, ops)
\ No newline at end of file
+
+    # 6. Flop Monte-Carlo Simulation
+    profileStreet("flop")
+    results = street_results(p_cards_org, flop_cards, deck_org, ops, pool) # use known cards + 2 random cards for turn and river
+
+
+
+    # 7. Calculate Flop Results
+    win_results_display(results, ops)
+    if show_outs: # equity after each possible turn card
+        outs_display(nextCards(p_cards_org, flop_cards, deck_org, ops, OUTS_RUNS), hand_rank_temp, potEquity(results[0], results[4], results[2]))
+
+
+
+    # 8. Enter Turn Card
+    print("")
+    print("Enter Turn Card")
+    turn_card = str_to_card( str(input("> Turn Card: ")) ) # turn card -> convert to card
+    # remove turn card from deck
+    deck_org.remove(turn_card)
+
+    # display current player hand
+    current_hand = p_cards_org + flop_cards + [turn_card] # create current player hand
+    hand_rank_temp = handRank(current_hand)[0] # current hand rank of player
+    print("")
+    print("Current Hand: " + str(rank_to_text(hand_rank_temp)) )
+
+
+
+    # 9. Turn Monte-Carlo Simulation
+    profileStreet("turn")
+    results = street_results(p_cards_org, flop_cards + [turn_card], deck_org, ops, pool) # exact when few opponents
+
+
+
+    # 10. Calculate Turn Results
+    win_results_display(results, ops)
+    if show_outs: # equity after each possible river card
+        outs_display(nextCards(p_cards_org, flop_cards + [turn_card], deck_org, ops, OUTS_RUNS), hand_rank_temp, potEquity(results[0], results[4], results[2]))
+
+
+
+    # 11. Enter River Card
+    print("")
+    print("Enter River Card")
+    river_card = str_to_card( str(input("> River Card: ")) ) # river card -> convert to card
+    # remove river card from deck
+    deck_org.remove(river_card)
+
+    # display current player hand
+    player_hand = p_cards_org + flop_cards + [turn_card,river_card] # create final player hand
+    hand_rank_temp = handRank(player_hand)[0] # hand rank of player
+    print("")
+    print("Current Hand: " + str(rank_to_text(hand_rank_temp)) )
+
+
+
+    # 12. River Monte-Carlo Simulation
+    profileStreet("river")
+    results = street_results(p_cards_org, flop_cards + [turn_card, river_card], deck_org, ops, pool) # exact when few opponents
+
+
+
+    # 13. Calculate River Results
+    win_results_display(results, ops)
+
+    if profile:
+        print("")
+        print(profileSummary())
+        if PROFILE_FILE is not None:
+            saveProfile(PROFILE_FILE)
+    if pool is not None:
+        pool.shutdown()
+    if CACHE_FILE is not None:
+        saveCache(CACHE_FILE)
+
+
+
+if __name__ == "__main__": # worker processes import this file without running the assistant
+    if len(sys.argv) > 1 and sys.argv[1] == "--build-preflop": # offline build of the preflop table -> --build-preflop [runs]
+        build_pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        buildPreflopTable(int(sys.argv[2]) if len(sys.argv) > 2 else TABLE_RUNS, build_pool)
+        if build_pool is not None:
+            build_pool.shutdown()
+    else:
+        main()
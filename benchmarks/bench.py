@@ -0,0 +1,186 @@
+# MONTEX - Benchmarks
+# ABOUT: Speed and memory of the hand evaluator and street simulations, saved as JSON so results can be compared between commits.
+# USAGE: python benchmarks/bench.py -o bench.json                        (run and save)
+#        python benchmarks/bench.py --compare old.json -o new.json       (run, save, and exit with 1 if anything got slower than --threshold)
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # run from a checkout without installing
+
+from montex.cards import parseCards
+from montex.evaluator import handStrength, handStrengthBatch, handRank
+from montex.simulation import simulate, enumerateExact, BATCH_SIZE
+
+CORPUS_SEED = 12345 # fixed corpus of hands and deals so every run measures the same work
+HERO = parseCards("AH KH")
+BOARD = parseCards("2C 7C 9D 10D QS")
+STREETS = [["preflop", 0], ["flop", 3], ["turn", 4], ["river", 5]] # [name, # known middle cards]
+OPPONENTS = [1, 3, 9]
+
+
+
+# Measure
+def bestTime(func, repeats=5, min_time=0.2):
+    # Run func repeatedly and take the fastest of several timed rounds, each at least min_time long
+    # OUTPUT: seconds per call
+    best = None
+    for i in range(repeats):
+        calls = 0
+        start = time.perf_counter()
+        while True:
+            func()
+            calls += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        if best is None or elapsed / calls < best:
+            best = elapsed / calls
+    return best
+
+
+def handCorpus(num_hands, num_cards=7):
+    # Fixed random hands of num_cards different cards
+    # OUTPUT: int array [num_hands, num_cards]
+    rng = np.random.default_rng(CORPUS_SEED)
+    return np.argsort(rng.random((num_hands, 52)), axis=1)[:, :num_cards]
+
+
+def result(value, unit, better="higher"):
+    # One benchmark result, better = "higher" or "lower" is an improvement
+    return {"value": value, "unit": unit, "better": better}
+
+
+def benchEvaluator(num_hands, repeats):
+    # Hands evaluated per second by handStrength, handRank and handStrengthBatch on the same 7-card corpus
+    # OUTPUT: dictionary of results
+    corpus = handCorpus(num_hands)
+    hands = corpus.tolist()
+    results = {}
+    
+    def scalar():
+        for h in hands:
+            handStrength(h)
+    
+    def rank():
+        for h in hands:
+            handRank(h)
+    
+    results["eval.handStrength"] = result(num_hands / bestTime(scalar, repeats), "hands/s")
+    results["eval.handRank"] = result(num_hands / bestTime(rank, repeats), "hands/s")
+    results["eval.handStrengthBatch"] = result(num_hands / bestTime(lambda: handStrengthBatch(corpus), repeats), "hands/s")
+    return results
+
+
+def benchStreets(num_runs, repeats):
+    # Simulated trials per second for every street at 1, 3 and 9 opponents, and exact heads-up turn / river deals per second
+    # OUTPUT: dictionary of results
+    results = {}
+    for name, num_known in STREETS:
+        m_cards = BOARD[:num_known]
+        deck = [c for c in range(52) if c not in HERO and c not in m_cards]
+        for ops in OPPONENTS:
+            run = lambda: simulate(HERO, m_cards, deck, ops, num_runs, np.random.default_rng(CORPUS_SEED))
+            results["sim." + name + ".ops" + str(ops)] = result(num_runs / bestTime(run, repeats), "trials/s")
+        if num_known >= 4:
+            deals = [0]
+            def run():
+                deals[0] = enumerateExact(HERO, m_cards, deck, 1)[2]
+            seconds = bestTime(run, repeats)
+            results["exact." + name + ".ops1"] = result(deals[0] / seconds, "deals/s")
+    return results
+
+
+def benchMemory(num_runs):
+    # Peak memory allocated per simulated trial on the flop (tracemalloc sees NumPy arrays too)
+    # OUTPUT: dictionary of results
+    results = {}
+    m_cards = BOARD[:3]
+    deck = [c for c in range(52) if c not in HERO and c not in m_cards]
+    for ops in OPPONENTS:
+        tracemalloc.start()
+        simulate(HERO, m_cards, deck, ops, num_runs, np.random.default_rng(CORPUS_SEED))
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        results["memory.flop.ops" + str(ops)] = result(peak / num_runs, "bytes/trial", "lower")
+    return results
+
+
+
+# Compare
+def compareResults(old, new, threshold):
+    # Print the change of every benchmark in both result files and list the ones worse by more than threshold (0.1 = 10%)
+    # OUTPUT: list of names of regressed benchmarks
+    regressions = []
+    for name in sorted(new["results"]):
+        if name not in old["results"]:
+            continue
+        a = old["results"][name]["value"]
+        b = new["results"][name]["value"]
+        change = b / a - 1 if a else 0.0
+        worse = -change if new["results"][name]["better"] == "higher" else change
+        flag = ""
+        if worse > threshold:
+            regressions.append(name)
+            flag = "  <- REGRESSION"
+        print("{:<28} {:>14.1f} -> {:>14.1f} {:<12} {:+7.1f}%{}".format(name, a, b, new["results"][name]["unit"], 100*change, flag))
+    return regressions
+
+
+def gitCommit():
+    # Current commit of the checkout, None if git is not available
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    except OSError:
+        return None
+    return out.stdout.strip() or None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the montex evaluator and simulations.")
+    parser.add_argument("-o", "--output", help="file to save the results to as JSON (default: print them)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1, help="slowdown counted as a regression (default: 0.1 = 10%%)")
+    parser.add_argument("--quick", action="store_true", help="smaller corpus and fewer repeats, for a fast check")
+    args = parser.parse_args(argv)
+    
+    num_hands = 20000 if args.quick else 100000
+    num_runs = 20000 if args.quick else 100000
+    repeats = 2 if args.quick else 5
+    results = {}
+    results.update(benchEvaluator(num_hands, repeats))
+    results.update(benchStreets(num_runs, repeats))
+    results.update(benchMemory(BATCH_SIZE))
+    report = {
+        "commit": gitCommit(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "settings": {"hands": num_hands, "runs": num_runs, "repeats": repeats},
+        "results": results,
+    }
+    
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=1, sort_keys=True)
+    else:
+        print(json.dumps(report, indent=1, sort_keys=True))
+    
+    if args.compare:
+        with open(args.compare) as f:
+            old = json.load(f)
+        if compareResults(old, report, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
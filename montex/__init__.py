@@ -0,0 +1,31 @@
+# MONTEX - Simulated Texas Hold 'Em Poker Assistant
+# ABOUT: Library for hand evaluation and win probability of Texas Hold 'Em spots, used by the interactive assistant, the batch command line (python -m montex)
+# the equity server (python -m montex.server) and bulk hand histories (python -m montex.history).
+
+from importlib import import_module
+
+from .cards import str_to_card, card_to_str, parseCards, handClass
+from .evaluator import handStrength, handStrengthBatch, handRank, rank_to_text
+from .simulation import simulate, simulateParallel, simulateStream, simulateMany, enumerateExact, confidenceHalfWidth
+from .engine import streetResults, streetStream, streetResultsMany, equity, equityStream
+from .ranges import parseRange, rangeEquity
+from .outs import nextCards, outs
+from .profiler import enableProfile, profileStreet, resetProfile, profileReport, profileSummary, saveProfile
+
+__all__ = ["str_to_card", "card_to_str", "parseCards", "handClass", "handStrength", "handStrengthBatch", "handRank", "rank_to_text",
+           "simulate", "simulateParallel", "simulateStream", "simulateMany", "enumerateExact", "confidenceHalfWidth",
+           "streetResults", "streetStream", "streetResultsMany", "equity", "equityStream",
+           "parseRange", "rangeEquity", "nextCards", "outs", "compareHands", "measureSampling", "convertHistory", "runHistory",
+           "enableProfile", "profileStreet", "resetProfile", "profileReport", "profileSummary", "saveProfile"]
+
+# names of the modules with their own command line (python -m montex.sampling), imported when first used:
+# importing them here would import them a second time when they are run
+LAZY_NAMES = {"compareHands": "compare", "measureSampling": "sampling", "convertHistory": "history", "runHistory": "history"}
+
+
+def __getattr__(name):
+    # Import a name of LAZY_NAMES from its module when it is first used, ex: montex.measureSampling
+    # OUTPUT: the name's function
+    if name in LAZY_NAMES:
+        return getattr(import_module("." + LAZY_NAMES[name], __name__), name)
+    raise AttributeError("module 'montex' has no attribute " + repr(name))
@@ -0,0 +1,79 @@
+# MONTEX - Result Cache
+# ABOUT: Street results cached by a canonical form of the spot that is the same for every relabelling of the suits.
+
+import json
+from collections import OrderedDict
+from itertools import permutations
+
+CACHE_SIZE = 10000 # most street results kept in memory, least recently used are removed first (0 = no cache)
+CACHE_VERSION = 2 # version of the saved result format, saved caches with another version are ignored
+
+
+
+# Result cache
+SUIT_PERMUTATIONS = list(permutations(range(4))) # every relabelling of the 4 suits
+result_cache = OrderedDict() # street results by canonical spot, least recently used first
+cache_stats = [0, 0] # [# hits, # misses]
+
+def canonicalSpot(p_cards, m_cards, deck):
+    # Map a spot to one form shared by every relabelling of its suits, ex: AH KH on 2C 7C 9D and AS KS on 2D 7D 9H
+    # card order within the pocket / middle / dead (not in deck) cards does not matter either
+    # OUTPUT: (pocket cards, middle cards, dead cards) as sorted tuples of card codes, smallest over all suit relabellings
+    seen = set(deck)
+    seen.update(p_cards)
+    seen.update(m_cards)
+    dead = [c for c in range(52) if c not in seen] # cards that are neither known nor can be dealt
+    best = None
+    for perm in SUIT_PERMUTATIONS:
+        form = tuple(tuple(sorted((c & ~3) | perm[c & 3] for c in group)) for group in (p_cards, m_cards, dead))
+        if best is None or form < best:
+            best = form
+    return best
+
+
+def cacheGet(key):
+    # Look up a cached result and mark it as recently used
+    # OUTPUT: copy of the result, None if not cached
+    if key in result_cache:
+        result_cache.move_to_end(key)
+        cache_stats[0] += 1
+        return list(result_cache[key])
+    cache_stats[1] += 1
+    return None
+
+
+def cachePut(key, result):
+    # Save a result, removing the least recently used results once there are more than CACHE_SIZE
+    if CACHE_SIZE <= 0:
+        return
+    result_cache[key] = list(result)
+    result_cache.move_to_end(key)
+    while len(result_cache) > CACHE_SIZE:
+        result_cache.popitem(last=False)
+
+
+def toTuple(item):
+    # Turn nested lists read from a JSON file back into tuples so they can be used as keys
+    # OUTPUT: tuple (or the item if not a list)
+    if isinstance(item, list):
+        return tuple(toTuple(i) for i in item)
+    return item
+
+
+def loadCache(path):
+    # Load cached results saved by saveCache, keeping the most recently used if there are more than CACHE_SIZE
+    try:
+        with open(path) as f:
+            saved = json.load(f)
+    except (OSError, ValueError):
+        return # nothing saved yet
+    if not isinstance(saved, dict) or saved.get("version") != CACHE_VERSION:
+        return # results in an older format
+    for key, result in saved["entries"]:
+        cachePut(toTuple(key), result)
+
+
+def saveCache(path):
+    # Save cached results in least to most recently used order
+    with open(path, "w") as f:
+        json.dump({"version": CACHE_VERSION, "entries": [[key, result] for key, result in result_cache.items()]}, f, separators=(",", ":"))
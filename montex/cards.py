@@ -0,0 +1,70 @@
+# MONTEX - Cards
+# ABOUT: Integer card codes used by the evaluator and simulations, and names of starting hands.
+
+SUITS = "CDHS" # suit index of each card code -> Clubs (0), Diamonds (1), Hearts (2), Spades (3)
+VALUE_CHARS = "23456789TJQKA" # one character per card value, used for starting hand names
+
+
+
+# Convert cards
+def str_to_card(txt):
+    # Convert string data to an integer card code, card = 4*(value - 2) + suit index -> 0 to 51
+    # 2-10 (or T) = #, 11 = Jack (J), 12 = Queen (Q), 13 = King (K), 14 = Ace (A) || Clubs (C), Diamonds (D), Hearts (H), Spades (S)
+    suit = txt[-1].upper() # last character of entry -> convert to uppercase
+    value = txt[:-1].upper() # remaining characters are card value -> convert to uppercase if possible
+    # convert face card values to numbers
+    if value == "J":
+        value = 11
+    elif value == "Q":
+        value = 12
+    elif value == "K":
+        value = 13
+    elif value == "A":
+        value = 14
+    elif value == "T":
+        value = 10
+    value = int(value)
+    if value < 2 or value > 14 or suit not in SUITS:
+        raise ValueError("invalid card: " + str(txt))
+    return 4*(value - 2) + SUITS.index(suit)
+
+
+def card_to_str(card):
+    # Convert an integer card code back to text in the same form str_to_card reads, ex: 48 -> "AC", 32 -> "10C"
+    # OUTPUT: string
+    value = (card >> 2) + 2
+    names = {11: "J", 12: "Q", 13: "K", 14: "A"}
+    return names.get(value, str(value)) + SUITS[card & 3]
+
+
+def parseCards(cards):
+    # Convert a list of cards or text of cards separated by spaces / commas into card codes, ex: "AH KH" -> [50, 46]
+    # cards that are already integer codes are kept as they are
+    # OUTPUT: list of card codes
+    if isinstance(cards, str):
+        cards = cards.replace(",", " ").split()
+    return [c if isinstance(c, int) else str_to_card(c) for c in cards]
+
+
+
+# Starting hands
+def handClass(p_cards):
+    # Name the starting hand of two pocket cards, suits only matter as suited (s) or offsuit (o)
+    # OUTPUT: string, ex: "AKs", "72o", "TT"
+    high = max(p_cards) >> 2 # card codes are ordered by value first
+    low = min(p_cards) >> 2
+    if high == low:
+        return VALUE_CHARS[high]*2
+    elif p_cards[0] & 3 == p_cards[1] & 3:
+        return VALUE_CHARS[high] + VALUE_CHARS[low] + "s"
+    return VALUE_CHARS[high] + VALUE_CHARS[low] + "o"
+
+
+def classCards(name):
+    # Get example pocket cards for a starting hand name (clubs, and diamonds for the second card if not suited)
+    # OUTPUT: [card, card]
+    high = VALUE_CHARS.index(name[0])
+    low = VALUE_CHARS.index(name[1])
+    if name.endswith("s"):
+        return [4*high, 4*low]
+    return [4*high, 4*low + 1]
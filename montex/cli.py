@@ -0,0 +1,109 @@
+# MONTEX - Batch Command Line
+# ABOUT: Win probability for many spots at once, read as CSV or JSON lines from a file or stdin and written in the same format.
+# USAGE: python -m montex spots.jsonl -o results.jsonl --trials 200000 --seed 1
+#        one spot per line -> {"hole": "AH KH", "board": "2C 7C 9D", "ops": 3} or CSV with a hole,board,ops header
+#        opponent ranges instead of random hands -> {"hole": "AKs", "ranges": ["JJ+, AQs+", "random"]} (hole can be a range too)
+#        --profile profile.json -> time spent dealing / evaluating / in showdowns for each street, with cache and hand counters
+
+import argparse
+import csv
+import json
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from . import simulation
+from .simulation import SAMPLING_METHODS
+from .cards import parseCards
+from .engine import equity
+from .ranges import rangeEquity
+from .profiler import STREET_NAMES, enableProfile, profileStreet, profileSummary, saveProfile
+
+FIELDS = ["hole", "board", "ops", "ranges", "win", "tie", "loss", "equity", "hands", "exact", "error"] # CSV output columns
+
+
+def readSpots(lines, fmt):
+    # Read spots from lines of CSV (with header) or JSON lines, skipping blank lines
+    # OUTPUT: generator of [line number, spot dictionary (CSV) or line of JSON text (see parseSpot)]
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        for row in reader:
+            yield [reader.line_num, row]
+    else:
+        for num, line in enumerate(lines, 1):
+            if line.strip():
+                yield [num, line]
+
+
+def parseSpot(spot):
+    # Spot dictionary of a line of readSpots
+    # OUTPUT: dictionary -> ValueError when a JSON line is not a JSON object
+    if isinstance(spot, dict):
+        return spot
+    spot = json.loads(spot)
+    if not isinstance(spot, dict):
+        raise ValueError("a spot must be a JSON object, got " + type(spot).__name__)
+    return spot
+
+
+def main(argv=None):
+    # Run the batch command line, argv = arguments (default: command line arguments)
+    parser = argparse.ArgumentParser(prog="montex", description="Texas Hold 'Em win probability for many spots.")
+    parser.add_argument("input", nargs="?", default="-", help="file of spots, - for stdin (default)")
+    parser.add_argument("-o", "--output", default="-", help="file to write results to, - for stdout (default)")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="input and output format (default: csv for .csv files, otherwise jsonl)")
+    parser.add_argument("--ops", type=int, default=1, help="number of opponents for spots that do not give one (default: 1)")
+    parser.add_argument("--trials", type=int, default=100000, help="most hands to simulate per spot (default: 100000)")
+    parser.add_argument("--precision", type=float, default=0, help="stop a spot once the 95%% confidence half-width of the win rate is this small, ex: 0.0025")
+    parser.add_argument("--max-time", type=float, default=None, help="stop a spot after this many seconds")
+    parser.add_argument("--sampling", choices=SAMPLING_METHODS, default="plain", help="how simulated hands are dealt, every method but plain needs fewer hands (default: plain)")
+    parser.add_argument("--seed", type=int, default=None, help="seed for repeatable results, spot i uses [seed, i]")
+    parser.add_argument("--profile", metavar="FILE", help="time each phase of the work by street, write it to FILE as JSON and a summary to stderr")
+    parser.add_argument("--workers", type=int, default=simulation.WORKERS, help="number of processes to simulate with (default: all cores)")
+    args = parser.parse_args(argv)
+    
+    fmt = args.format or ("csv" if args.input.lower().endswith(".csv") else "jsonl")
+    source = sys.stdin if args.input == "-" else open(args.input, newline="")
+    target = sys.stdout if args.output == "-" else open(args.output, "w", newline="")
+    pool = ProcessPoolExecutor(max_workers=args.workers) if args.workers > 1 else None # shared by every spot
+    writer = None
+    if args.profile:
+        enableProfile()
+    if fmt == "csv":
+        writer = csv.DictWriter(target, fieldnames=FIELDS, extrasaction="ignore")
+        writer.writeheader()
+    
+    try:
+        for i, [num, spot] in enumerate(readSpots(source, fmt)):
+            try:
+                spot = parseSpot(spot)
+                seed = None if args.seed is None else [args.seed, i]
+                profileStreet(STREET_NAMES.get(len(parseCards(spot.get("board") or "")), "other"))
+                if spot.get("ranges"): # one range per opponent
+                    ranges = json.loads(spot["ranges"]) if isinstance(spot["ranges"], str) else spot["ranges"] # CSV cells hold a JSON list
+                    ops = len(ranges)
+                    result = rangeEquity(spot["hole"], ranges, spot.get("board") or "", args.trials, seed)
+                else:
+                    ops = int(spot.get("ops") or args.ops)
+                    result = equity(spot["hole"], spot.get("board") or "", ops, args.trials, seed, args.precision, args.max_time, pool, spot.get("sampling") or args.sampling)
+            except (KeyError, ValueError, TypeError) as e: # bad spot, report it and carry on with the rest
+                print("line " + str(num) + ": skipped, " + repr(e), file=sys.stderr)
+                continue
+            row = dict(spot, ops=ops, **result)
+            if writer is not None:
+                writer.writerow(row)
+            else:
+                target.write(json.dumps(row) + "\n")
+    finally:
+        if args.profile:
+            saveProfile(args.profile)
+            print(profileSummary(), file=sys.stderr)
+        if pool is not None:
+            pool.shutdown()
+        if source is not sys.stdin:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+# MONTEX - Hand Comparison
+# ABOUT: Several candidate pocket cards on the same spot, simulated against the same opponent hands and runouts (common random numbers).
+# Each run deals 2 spare cards past what is needed -> a hero holding one of the dealt cards takes the next cards instead, which is still a
+# uniformly random deal for that hero, and every other run (and the opponents' hand strengths) is shared by all heroes. The differences between
+# heroes are then far less noisy than from independent simulations, and dealing and opponent evaluation are done once instead of once per hero.
+# USAGE: python -m montex.compare "AH KH" "QS QD" "7C 8C" --board "2H 7H 9D" --ops 3 --trials 200000 --seed 1
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from . import simulation
+from .cards import card_to_str
+from .engine import checkSpot
+from .evaluator import CARD_KEY_NP, CARD_MASK_NP, cardState, flushShifts, stateStrengthBatch
+from .outs import showdownShares
+from .profiler import profile_state, enableProfile, tick, tock, count, takeProfile, mergeProfile
+from .simulation import BATCH_SIZE, CHUNK_RUNS, EXACT_LIMIT, exactCount, enumerateExact, newDealer, partialShuffle, potEquity
+
+SPARE_CARDS = 2 # extra cards dealt in each run, enough to replace both cards of a hero
+
+
+
+# Simulation
+def heroDeal(dealt, num_dealt, h_cards):
+    # A hero's deal of each run -> the first num_dealt cards of the run that the hero does not hold
+    # dealt = [run, num_dealt + SPARE_CARDS] card codes
+    # OUTPUT: [rows that differ from the shared deal, their deal [row, num_dealt]]
+    rows = np.nonzero(np.isin(dealt[:, :num_dealt], h_cards).any(axis=1))[0]
+    held = np.isin(dealt[rows], h_cards)
+    order = np.argsort(held, axis=1, kind="stable")[:, :num_dealt] # cards the hero holds move to the end, the rest keep their order
+    return [rows, np.take_along_axis(dealt[rows], order, axis=1)]
+
+
+def simulateHeroes(h_cards, m_cards, num_opponents, num_runs, rng=None):
+    # Monte Carlo simulation of every hero (list of pocket cards) against the same random opponents and runouts
+    # OUTPUT: [# wins, # ties, pot shares, cross] -> lists with one entry per hero over num_runs hands,
+    #         cross[a][b] = sum over runs of hero a's pot share times hero b's (for the variance of their difference)
+    if rng is None:
+        rng = np.random.default_rng()
+    num_heroes = len(h_cards)
+    deck = np.array([c for c in range(52) if c not in m_cards], dtype=np.intp) # heroes' cards are left in, see heroDeal
+    num_board = 5 - len(m_cards)
+    num_dealt = num_board + 2*num_opponents
+
+    b_key, b_mask = cardState(list(m_cards))
+    o_shifts = flushShifts(b_mask, num_board + 2)
+    heroes = []
+    for p_cards in h_cards:
+        p_key, p_mask = cardState(list(p_cards) + list(m_cards))
+        heroes.append([np.asarray(p_cards, dtype=np.intp), p_key, p_mask, flushShifts(p_mask, num_board)])
+
+    wins = np.zeros(num_heroes, dtype=np.int64)
+    ties = np.zeros(num_heroes, dtype=np.int64)
+    pots = np.zeros(num_heroes)
+    cross = np.zeros((num_heroes, num_heroes))
+    dealer = newDealer(deck, min(BATCH_SIZE, num_runs))
+    for start in range(0, num_runs, BATCH_SIZE):
+        n = min(BATCH_SIZE, num_runs - start)
+
+        # Shared deal -> runout, then opponents' cards, then the spares
+        start_time = tick()
+        dealt = partialShuffle(dealer, n, num_dealt + SPARE_CARDS, rng)
+        runout = dealt[:, :num_board]
+        o_cards = dealt[:, num_board:num_dealt].reshape(n, num_opponents, 2)
+        r_key = CARD_KEY_NP[runout].sum(axis=1)
+        r_mask = CARD_MASK_NP[runout].sum(axis=1)
+        o_key = (b_key + r_key)[:, None] + CARD_KEY_NP[o_cards].sum(axis=2)
+        o_mask = (b_mask | r_mask)[:, None] | CARD_MASK_NP[o_cards].sum(axis=2)
+        start_time = tock("deal", start_time)
+        o_scores = stateStrengthBatch(o_key, o_mask, o_shifts)
+        start_time = tock("evaluate", start_time)
+
+        run_shares = np.empty((n, num_heroes))
+        for h, [p_cards, p_key, p_mask, p_shifts] in enumerate(heroes):
+            # only the runs dealing one of the hero's cards are dealt and evaluated again
+            rows, deal = heroDeal(dealt, num_dealt, p_cards)
+            h_r_key = r_key.copy()
+            h_r_mask = r_mask.copy()
+            h_o_scores = o_scores.copy()
+            if len(rows):
+                h_runout = deal[:, :num_board]
+                h_o_cards = deal[:, num_board:].reshape(len(rows), num_opponents, 2)
+                h_r_key[rows] = CARD_KEY_NP[h_runout].sum(axis=1)
+                h_r_mask[rows] = CARD_MASK_NP[h_runout].sum(axis=1)
+                h_o_scores[rows] = stateStrengthBatch((b_key + h_r_key[rows])[:, None] + CARD_KEY_NP[h_o_cards].sum(axis=2),
+                                                      (b_mask | h_r_mask[rows])[:, None] | CARD_MASK_NP[h_o_cards].sum(axis=2), o_shifts)
+            start_time = tock("deal", start_time)
+            p_score = stateStrengthBatch(p_key + h_r_key, p_mask | h_r_mask, p_shifts)
+            start_time = tock("evaluate", start_time)
+            won, share = showdownShares(p_score, h_o_scores)
+            wins[h] += int(won.sum())
+            ties[h] += int(np.count_nonzero((share > 0) & (won == 0)))
+            pots[h] += share.sum()
+            run_shares[:, h] = share
+            start_time = tock("showdown", start_time)
+            count("evaluations", n + len(rows)*num_opponents)
+        cross += run_shares.T @ run_shares
+        count("hands", n)
+        count("evaluations", n*num_opponents)
+
+    return [wins.tolist(), ties.tolist(), pots.tolist(), cross.tolist()]
+
+
+def heroesChunk(task):
+    # Simulate one chunk of runs, task = [h_cards, m_cards, num_opponents, num_runs, seed, profile] (profile as in simulateChunk)
+    # OUTPUT: simulateHeroes() results + [profile of the chunk (None unless asked for)]
+    h_cards, m_cards, num_opponents, num_runs, seed, profile = task
+    if profile is not None:
+        enableProfile(profile)
+        takeProfile()
+    result = simulateHeroes(h_cards, m_cards, num_opponents, num_runs, np.random.default_rng(seed))
+    return result + [takeProfile() if profile else None]
+
+
+def simulateHeroesParallel(h_cards, m_cards, num_opponents, num_runs, seed=None, pool=None):
+    # simulateHeroes in CHUNK_RUNS sized chunks with their own seed streams on the worker pool (or here if pool is None),
+    # added up in order so the totals are the same for any number of workers
+    # OUTPUT: [# wins, # ties, pot shares, cross] (see simulateHeroes)
+    sizes = [min(CHUNK_RUNS, num_runs - start) for start in range(0, num_runs, CHUNK_RUNS)]
+    remote = pool is not None and len(sizes) > 1
+    tasks = [[[list(p) for p in h_cards], list(m_cards), num_opponents, n, ss, profile_state[0] if remote else None]
+             for n, ss in zip(sizes, np.random.SeedSequence(seed).spawn(len(sizes)))]
+    chunks = pool.map(heroesChunk, tasks) if remote else map(heroesChunk, tasks)
+
+    num_heroes = len(h_cards)
+    totals = [np.zeros(num_heroes, dtype=np.int64), np.zeros(num_heroes, dtype=np.int64), np.zeros(num_heroes), np.zeros((num_heroes, num_heroes))]
+    for result in chunks:
+        for total, part in zip(totals, result):
+            total += part
+        if result[4] is not None:
+            mergeProfile(result[4])
+    return [t.tolist() for t in totals]
+
+
+
+# Comparison
+def compareHands(heroes, board=(), ops=1, trials=100000, seed=None, pool=None):
+    # Results of several pocket cards on the same spot, ex: compareHands(["AH KH", "QS QD", "7C 8C"], "2H 7H 9D", ops=3)
+    # simulated together with common random numbers, or enumerated exactly for each hero when every one of them has few enough deals
+    # OUTPUT: dictionary -> # hands, True if exact, and for each hero (best pot equity first) its win / tie rates, pot equity and its
+    #         95% confidence half-width, the difference in pot equity to the best hero and the half-width of that difference,
+    #         with "independent_error" = the half-width the difference would have from separate simulations of the same size
+    if not heroes:
+        raise ValueError("need at least 1 hero")
+    spots = [checkSpot(hole, board, ops, trials) for hole in heroes] # [pocket cards, middle cards, unseen cards] of each hero
+    h_cards = [spot[0] for spot in spots]
+    m_cards = spots[0][1]
+
+    num_heroes = len(h_cards)
+    exact = exactCount(50 - len(m_cards), 5 - len(m_cards), ops) <= EXACT_LIMIT
+    if exact: # no sampling noise to share, each hero is played out on its own
+        results = [enumerateExact(p_cards, m_cards, deck, ops) for p_cards, m_cards, deck in spots]
+        num_hands = results[0][2]
+        wins = [r[0] for r in results]
+        ties = [r[1] for r in results]
+        pots = [potEquity(r[0], r[3], r[2])*num_hands for r in results]
+        cross = np.zeros((num_heroes, num_heroes))
+    else:
+        num_hands = trials
+        wins, ties, pots, cross = simulateHeroesParallel(h_cards, m_cards, ops, trials, seed, pool)
+
+    mean = np.asarray(pots) / num_hands
+    moment = np.asarray(cross) / num_hands # mean of the product of two heroes' pot shares
+    def halfWidth(variance):
+        return 0.0 if exact else float(1.96*np.sqrt(max(variance, 0.0) / num_hands))
+
+    best = int(np.argmax(mean))
+    order = sorted(range(num_heroes), key=lambda h: -mean[h])
+    return {
+        "hands": num_hands,
+        "exact": exact,
+        "heroes": [{
+            "hole": " ".join(card_to_str(c) for c in h_cards[h]),
+            "win": wins[h] / num_hands,
+            "tie": ties[h] / num_hands,
+            "equity": float(mean[h]),
+            "error": halfWidth(moment[h][h] - mean[h]**2),
+            "difference": float(mean[h] - mean[best]),
+            "difference_error": halfWidth(moment[h][h] - 2*moment[h][best] + moment[best][best] - (mean[h] - mean[best])**2),
+            "independent_error": halfWidth(moment[h][h] - mean[h]**2 + moment[best][best] - mean[best]**2) if h != best else 0.0,
+        } for h in order],
+    }
+
+
+def main(argv=None):
+    # Compare pocket cards on one spot from the command line and print a table
+    parser = argparse.ArgumentParser(prog="montex.compare", description="Compare Texas Hold 'Em pocket cards against the same opponents and runouts.")
+    parser.add_argument("heroes", nargs="+", help="pocket cards of each hero, ex: \"AH KH\" \"QS QD\"")
+    parser.add_argument("--board", default="", help="known middle cards, ex: \"2H 7H 9D\"")
+    parser.add_argument("--ops", type=int, default=1, help="number of opponents (default: 1)")
+    parser.add_argument("--trials", type=int, default=100000, help="hands to simulate (default: 100000)")
+    parser.add_argument("--seed", type=int, default=None, help="seed for repeatable results")
+    parser.add_argument("--workers", type=int, default=simulation.WORKERS, help="number of processes to simulate with (default: all cores)")
+    args = parser.parse_args(argv)
+
+    pool = ProcessPoolExecutor(max_workers=args.workers) if args.workers > 1 else None
+    try:
+        report = compareHands(args.heroes, args.board, args.ops, args.trials, args.seed, pool)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    print(str(report["hands"]) + " hands" + (" (exact)" if report["exact"] else "") + ", +/- = 95% confidence half-width")
+    print("{:<8} {:>9} {:>9} {:>9} {:>9} {:>10} {:>9} {:>12}".format("Hero", "Win", "Tie", "Equity", "+/-", "vs Best", "+/-", "Independent"))
+    for hero in report["heroes"]:
+        print("{:<8} {:>8.2f}% {:>8.2f}% {:>8.2f}% {:>8.3f}% {:>9.2f}% {:>8.3f}% {:>11.3f}%".format(
+            hero["hole"], 100*hero["win"], 100*hero["tie"], 100*hero["equity"], 100*hero["error"],
+            100*hero["difference"], 100*hero["difference_error"], 100*hero["independent_error"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+# MONTEX - Equity
+# ABOUT: Results of a spot on any street, choosing between the preflop table, the cache, exact enumeration and simulation.
+
+import time
+
+from .cache import canonicalSpot, cacheGet, cachePut
+from .cards import parseCards, handClass
+from .preflop import loadPreflopTable
+from .profiler import count, countCategories
+from .evaluator import rank_to_text
+from .simulation import EXACT_LIMIT, exactCount, enumerateExact, simulateParallel, simulateStream, simulateMany, confidenceHalfWidth, potEquity
+
+
+
+# Street results
+def streetResults(p_cards, m_cards, deck, num_opponents, num_runs, seed=None, pool=None, precision=0, max_time=None, sampling="plain"):
+    # Get results for the current street, enumerating every deal exactly when there are few enough, otherwise simulating up to num_runs hands
+    # seed = fixed seed for repeatable results, pool = ProcessPoolExecutor to share simulations over
+    # precision / max_time = stop simulating at this confidence half-width of the win rate / after this many seconds
+    # sampling = "plain" random deals or a variance reduction method (see SAMPLING_METHODS), every method estimates the same results
+    # OUTPUT: [# wins, # ties, # hands, True if exact, shares, categories] -> shares[k] = # pots split k ways, categories[c] = # final hands of rank c
+    key = spotKey(p_cards, m_cards, deck, num_opponents, num_runs, precision, sampling)
+    cached = usesCache(m_cards, deck, num_opponents, seed)
+    result = cacheGet(key) if cached else None
+    if cached:
+        count("cache misses" if result is None else "cache hits")
+    if result is None:
+        result = solveStreet(p_cards, m_cards, deck, num_opponents, num_runs, seed, pool, precision, max_time, sampling)
+        countCategories(result[5])
+        if cached and (not isSimulated(m_cards, deck, num_opponents) or isComplete(result, num_runs, precision)):
+            cachePut(key, result)
+    return result
+
+
+def solveStreet(p_cards, m_cards, deck, num_opponents, num_runs, seed=None, pool=None, precision=0, max_time=None, sampling="plain"):
+    # Get results for the current street without the cache (see streetResults)
+    # OUTPUT: [# wins, # ties, # hands, True if exact, shares, categories]
+    if len(m_cards) == 0 and len(deck) == 50 and 1 <= num_opponents <= 9: # preflop with no other known cards, look up the saved result
+        table = loadPreflopTable()
+        if table:
+            wins, ties, shares, categories = table["results"][handClass(p_cards)][num_opponents - 1]
+            count("table lookups")
+            return [wins, ties, table["runs"], False, shares, categories]
+    if exactCount(len(deck), 5 - len(m_cards), num_opponents) <= EXACT_LIMIT:
+        result = enumerateExact(p_cards, m_cards, deck, num_opponents)
+        return result[:3] + [True] + result[3:]
+    result = simulateParallel(p_cards, m_cards, deck, num_opponents, num_runs, seed, pool, precision, max_time, sampling)
+    return result[:3] + [False] + result[3:]
+
+
+def streetStream(p_cards, m_cards, deck, num_opponents, num_runs, seed=None, pool=None, precision=0, max_time=None, sampling="plain"):
+    # Results of streetResults as they improve -> one result when it is cached, in the preflop table or exact, otherwise the running totals
+    # after every simulated chunk. Only a simulation that is run to its end is cached, stopping early keeps the results seen so far
+    # OUTPUT: generator of [# wins, # ties, # hands, True if exact, shares, categories]
+    key = spotKey(p_cards, m_cards, deck, num_opponents, num_runs, precision, sampling)
+    cached = usesCache(m_cards, deck, num_opponents, seed)
+    result = cacheGet(key) if cached else None
+    if cached:
+        count("cache misses" if result is None else "cache hits")
+    if result is None and not isSimulated(m_cards, deck, num_opponents):
+        result = solveStreet(p_cards, m_cards, deck, num_opponents, num_runs, seed, pool, precision, max_time, sampling)
+        countCategories(result[5])
+        cachePut(key, result)
+    if result is not None:
+        yield result
+        return
+    for totals in simulateStream(p_cards, m_cards, deck, num_opponents, num_runs, seed, pool, precision, max_time, sampling):
+        result = totals[:3] + [False] + totals[3:]
+        yield result
+    countCategories(result[5])
+    if cached and isComplete(result, num_runs, precision):
+        cachePut(key, result)
+
+
+def streetResultsMany(spots, pool=None, sampling="plain"):
+    # streetResults for several spots at once, spots = list of [p_cards, m_cards, deck, num_opponents, num_runs, seed, precision, max_time]
+    # spots simulated to the full num_runs (precision 0, no max_time) that are not cached are simulated together with simulateMany,
+    # identical unseeded spots (same canonical key) are solved once, seeded spots are never cached (see usesCache), the rest are solved one by one
+    # OUTPUT: list of streetResults results, one per spot
+    results = [None]*len(spots)
+    waiting = {} # canonical key (or ("seeded", spot index)) -> indexes of the spots simulated together
+    for i, spot in enumerate(spots):
+        p_cards, m_cards, deck, num_opponents, num_runs, seed, precision, max_time = spot
+        key = spotKey(p_cards, m_cards, deck, num_opponents, num_runs, precision, sampling)
+        if not (precision == 0 and max_time is None and isSimulated(m_cards, deck, num_opponents)):
+            results[i] = streetResults(p_cards, m_cards, deck, num_opponents, num_runs, seed, pool, precision, max_time, sampling)
+        elif seed is not None: # its own repeatable numbers
+            waiting[("seeded", i)] = [i]
+        elif key in waiting:
+            waiting[key].append(i)
+        else:
+            results[i] = cacheGet(key)
+            count("cache misses" if results[i] is None else "cache hits")
+            if results[i] is None:
+                waiting[key] = [i]
+    
+    keys = list(waiting)
+    for key, totals in zip(keys, simulateMany([spots[waiting[key][0]][:6] for key in keys], pool, sampling)):
+        result = totals[:3] + [False] + totals[3:]
+        countCategories(result[5])
+        if key[0] != "seeded":
+            cachePut(key, result)
+        for i in waiting[key]:
+            results[i] = result
+    return results
+
+
+def spotKey(p_cards, m_cards, deck, num_opponents, num_runs, precision, sampling):
+    # Cache key of a street, the same for every suit relabelling of the spot
+    # OUTPUT: tuple
+    key = canonicalSpot(p_cards, m_cards, deck) + (num_opponents, num_runs, precision)
+    return key if sampling == "plain" else key + (sampling,) # plain keys are the same as in caches saved before the sampling methods
+
+
+def usesCache(m_cards, deck, num_opponents, seed):
+    # True when a street's result can be read from and saved to the cache -> anything but a seeded simulation,
+    # whose numbers must be the ones of its own seed (not of another seed or suit relabelling of the spot)
+    # OUTPUT: boolean
+    return seed is None or not isSimulated(m_cards, deck, num_opponents)
+
+
+def isComplete(result, num_runs, precision):
+    # True when a simulated street's result did not stop for time -> all num_runs hands or precise enough
+    # OUTPUT: boolean
+    wins, ties, hands = result[:3]
+    return hands >= num_runs or (precision > 0 and confidenceHalfWidth(wins, hands) <= precision)
+
+
+def isSimulated(m_cards, deck, num_opponents):
+    # True when solveStreet simulates the spot -> not in the preflop table and too many deals to enumerate
+    # OUTPUT: boolean
+    if len(m_cards) == 0 and len(deck) == 50 and 1 <= num_opponents <= 9 and loadPreflopTable():
+        return False
+    return exactCount(len(deck), 5 - len(m_cards), num_opponents) > EXACT_LIMIT
+    
+    
+
+
+def equity(hole, board=(), ops=1, trials=100000, seed=None, precision=0, max_time=None, pool=None, sampling="plain"):
+    # Chance of the pocket cards hole winning / tying against ops random opponents, with board = known middle cards (0-5)
+    # cards can be text or card codes, ex: equity("AH KH", "2C 7C 9D", ops=3)
+    # trials = most hands to simulate, precision / max_time = stop early at this 95% confidence half-width / after this many seconds
+    # sampling = "plain", "stratified", "antithetic" or "halton" -> ways of dealing simulated hands that need fewer of them (see sampledDeal)
+    # OUTPUT: dictionary -> win / tie / loss rates, pot equity (wins + split pot shares), # hands, True if exact,
+    #         95% confidence half-width of the win rate (0 if exact), rate of pots split 2 / 3 / ... ways, rate of each final hand of the player
+    p_cards, m_cards, deck = checkSpot(hole, board, ops, trials)
+    return resultSummary(streetResults(p_cards, m_cards, deck, ops, trials, seed, pool, precision, max_time, sampling))
+
+
+def equityStream(hole, board=(), ops=1, trials=100000, seed=None, precision=0, max_time=None, pool=None, interval=0.05, sampling="plain"):
+    # equity() given while the simulation runs, at most once every interval seconds and always once at the end, ex:
+    # for result in equityStream("AH KH", ops=3, trials=10**7): print(result["win"], result["error"]) -> break out of the loop to stop early
+    # OUTPUT: generator of equity() dictionaries, "done" = True for the final result
+    p_cards, m_cards, deck = checkSpot(hole, board, ops, trials)
+    last_time = None
+    for result in streetStream(p_cards, m_cards, deck, ops, trials, seed, pool, precision, max_time, sampling):
+        if last_time is None or time.perf_counter() - last_time >= interval:
+            last_time = time.perf_counter()
+            yield dict(resultSummary(result), done=False)
+    yield dict(resultSummary(result), done=True) # same numbers as the last result when it was just given
+
+
+def checkSpot(hole, board, ops, trials):
+    # Read and check the cards, number of opponents and most hands to simulate of equity() / equityStream()
+    # OUTPUT: [pocket cards, middle cards, unseen cards] as card codes
+    p_cards = parseCards(hole)
+    m_cards = parseCards(board)
+    if len(p_cards) != 2:
+        raise ValueError("need 2 pocket cards, got " + str(len(p_cards)))
+    if len(m_cards) > 5:
+        raise ValueError("at most 5 middle cards, got " + str(len(m_cards)))
+    if len(set(p_cards + m_cards)) != len(p_cards) + len(m_cards):
+        raise ValueError("the same card is used twice")
+    if ops < 1 or 2*ops + 7 > 52:
+        raise ValueError("number of opponents must be 1 to 22, got " + str(ops))
+    if trials < 1:
+        raise ValueError("trials must be at least 1, got " + str(trials))
+    return [p_cards, m_cards, [c for c in range(52) if c not in p_cards and c not in m_cards]]
+
+
+def resultSummary(result):
+    # Street results as the dictionary of equity()
+    # OUTPUT: dictionary
+    wins, ties, hands, exact, shares, categories = result
+    return {
+        "win": wins / hands,
+        "tie": ties / hands,
+        "loss": (hands - wins - ties) / hands,
+        "equity": potEquity(wins, shares, hands),
+        "hands": hands,
+        "exact": exact,
+        "error": 0.0 if exact else float(confidenceHalfWidth(wins, hands)),
+        "split": {str(k): shares[k] / hands for k in range(2, len(shares)) if shares[k]},
+        "final": {rank_to_text(c): categories[c] / hands for c in range(1, 11) if categories[c]},
+    }
@@ -0,0 +1,176 @@
+# MONTEX - Hand Evaluator
+# ABOUT: Lookup-table hand strength for hands of up to 7 integer card codes, one hand at a time or many at once with NumPy.
+
+import numpy as np
+
+
+
+# Card lookup values
+# hand strength = category << 20 | up to five card values (4 bits each, most important first), so comparing two strengths
+# compares category then every tie-breaker and equal numbers are a true tie
+CARD_KEY = [5**(c >> 2) for c in range(52)] # base-5 digit of the card value, summing a hand gives the count of each value (max 4)
+CARD_MASK = [1 << (16*(c & 3) + (c >> 2)) for c in range(52)] # card bit in a 64-bit hand mask, one 16-bit block of values per suit
+
+
+# Build lookup tables
+def straightHigh(mask):
+    # Return highest card value of a straight in a 13-bit value mask (bit 0 = 2, bit 12 = Ace)
+    # OUTPUT: Card Value (0 if no straight), O(1)
+    for r in range(12, 3, -1): # check each straight from Ace high down to Six high
+        if (mask >> (r - 4)) & 31 == 31: # five values in a row
+            return r + 2
+    if mask & 4111 == 4111: # A-2-3-4-5, Ace plays low
+        return 5
+    return 0
+
+
+def packValues(category, values):
+    # Combine hand category and tie-breaking card values (most important first) into a hand strength
+    # OUTPUT: hand strength, O(1)
+    score = category << 20
+    for i in range(min(len(values), 5)):
+        score |= values[i] << (16 - 4*i)
+    return score
+
+
+def countStrength(counts):
+    # Get strength of a hand without a flush from the number of cards of each value
+    # OUTPUT: hand strength, O(1)
+    values = [r + 2 for r in range(12, -1, -1) if counts[r] > 0] # card values in the hand, highest first
+    quads = [v for v in values if counts[v - 2] == 4] # card values with each frequency, highest first
+    trips = [v for v in values if counts[v - 2] == 3]
+    doubles = [v for v in values if counts[v - 2] == 2]
+    singles = [v for v in values if counts[v - 2] == 1]
+    
+    if quads:
+        return packValues(8, [quads[0]] + [v for v in values if v != quads[0]][:1]) # four of a kind + kicker
+    if trips and (len(trips) > 1 or doubles):
+        return packValues(7, [trips[0], max(trips[1:] + doubles)]) # full house, highest triplet over best pair
+    straight = straightHigh(sum(1 << (v - 2) for v in values))
+    if straight:
+        return packValues(5, [straight]) # straight
+    if trips:
+        return packValues(4, [trips[0]] + singles[:2]) # three of a kind + 2 kickers
+    if len(doubles) > 1:
+        kicker = sorted(doubles[2:] + singles, reverse=True)[:1] # third pair can be the kicker
+        return packValues(3, doubles[:2] + kicker) # two pair + kicker
+    if doubles:
+        return packValues(2, [doubles[0]] + singles[:3]) # one pair + 3 kickers
+    return packValues(1, singles[:5]) # high card
+
+
+def flushStrength(mask):
+    # Get strength of the cards of one suit from their 13-bit value mask
+    # OUTPUT: hand strength (0 if not a flush), O(1)
+    if bin(mask).count("1") < 5: # less than 5 cards of the suit
+        return 0
+    straight = straightHigh(mask)
+    if straight == 14:
+        return packValues(10, [14]) # royal flush
+    elif straight:
+        return packValues(9, [straight]) # straight flush
+    return packValues(6, [r + 2 for r in range(12, -1, -1) if mask >> r & 1][:5]) # flush, 5 highest cards of the suit
+
+
+def buildRankTable():
+    # Get strength of every combination of up to 7 card values, keyed by the sum of CARD_KEY of the hand
+    # OUTPUT: dictionary {key: hand strength}, built once (~50k hands)
+    table = {}
+    counts = [0]*13 # number of cards of each value
+    
+    def fill(r, n, key):
+        # set number of cards of value r and below, n = cards used so far
+        if r < 0:
+            if n > 0:
+                table[key] = countStrength(counts)
+            return
+        for c in range(min(4, 7 - n) + 1):
+            counts[r] = c
+            fill(r - 1, n + c, key + c*5**r)
+        counts[r] = 0
+    
+    fill(12, 0, 0)
+    return table
+
+
+RANK_TABLE = buildRankTable() # strength of hands without a flush
+FLUSH_TABLE = [flushStrength(m) for m in range(8192)] # strength of the flush cards of a suit, 0 if no flush
+
+
+# Evaluate hands
+def handStrength(hand):
+    # Get the strength of a hand of up to 7 card codes, a higher number is a better hand
+    # OUTPUT: hand strength, O(n)
+    key = 0
+    mask = 0
+    for c in hand:
+        key += CARD_KEY[c]
+        mask |= CARD_MASK[c]
+    score = RANK_TABLE[key]
+    # at most one suit can hold a flush in 7 cards, and only a full house or better beats it
+    for shift in (0, 16, 32, 48):
+        flush = FLUSH_TABLE[(mask >> shift) & 8191]
+        if flush > score:
+            score = flush
+    return score
+
+
+def handRank(hand):
+    # Get the ranking of the hand based on all the different poker hands possible
+    # 1 = high card, 2 = one pair, 3 = two pair, 4 = three of a kind, 5 = straight, 6 = flush, 7 = full house, 8 = four of a kind, 9 = straight flush, 10 = royal flush
+    # OUTPUT: [Hand Rank, Card Value], O(n)
+    score = handStrength(hand)
+    return [score >> 20, (score >> 16) & 15]
+    
+    
+# Vectorized evaluation
+# same lookup tables as NumPy arrays, rank table stored as sorted keys + strengths for np.searchsorted
+CARD_KEY_NP = np.array(CARD_KEY, dtype=np.int64)
+CARD_MASK_NP = np.array(CARD_MASK, dtype=np.int64)
+RANK_KEYS_NP = np.array(sorted(RANK_TABLE), dtype=np.int64)
+RANK_VALUES_NP = np.array([RANK_TABLE[k] for k in RANK_KEYS_NP.tolist()], dtype=np.int32)
+FLUSH_TABLE_NP = np.array(FLUSH_TABLE, dtype=np.int32)
+
+
+def handStrengthBatch(hands):
+    # Get the strength of many hands at once, hands = integer array of card codes with the cards of each hand on the last axis
+    # OUTPUT: array of hand strengths (shape of hands without the last axis), O(n)
+    key = CARD_KEY_NP[hands].sum(axis=-1)
+    mask = CARD_MASK_NP[hands].sum(axis=-1) # cards in a hand are different so the sum sets one bit per card
+    return stateStrengthBatch(key, mask)
+
+
+# Incremental evaluation
+# a hand's key and mask are sums over its cards, so the known cards of a street are added up once and each trial only adds its own cards
+def cardState(cards):
+    # Get the partial state of known cards -> [sum of CARD_KEY, sum of CARD_MASK]
+    # OUTPUT: [key, mask], O(n)
+    key = 0
+    mask = 0
+    for c in cards:
+        key += CARD_KEY[c]
+        mask |= CARD_MASK[c]
+    return [key, mask]
+
+
+def flushShifts(mask, num_more):
+    # Suit blocks of a hand mask that can still hold a flush after num_more cards are added (at most 2 suits for 7 cards)
+    # OUTPUT: tuple of shifts to check
+    return tuple(shift for shift in (0, 16, 32, 48) if bin((mask >> shift) & 8191).count("1") + num_more >= 5)
+
+
+def stateStrengthBatch(key, mask, shifts=(0, 16, 32, 48)):
+    # Get the strength of many hands from their keys and masks, only looking for flushes in the suit blocks of shifts
+    # OUTPUT: array of hand strengths (shape of key), O(n)
+    score = RANK_VALUES_NP[np.searchsorted(RANK_KEYS_NP, key)]
+    for shift in shifts:
+        np.maximum(score, FLUSH_TABLE_NP[(mask >> shift) & 8191], out=score)
+    return score
+
+
+def rank_to_text(rank):
+    # Convert hand rank number to name type
+    # OUTPUT: string
+    val = int(rank)
+    rank_names = ["High Card", "One Pair", "Two Pair", "Three of a Kind", "Straight", "Flush", "Full House", "Four of a Kind", "Straight Flush", "Royal Flush"]
+    return rank_names[val - 1]
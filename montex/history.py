@@ -0,0 +1,195 @@
+# MONTEX - Hand Histories
+# ABOUT: Bulk equity of recorded hands -> every street of every hand, read in chunks from text (CSV) or a compact binary file
+# that is memory-mapped, and written as one memory-mapped column file per result so memory stays bounded for any number of hands.
+# Each street is solved by the same engine as the interactive assistant and the batch command line (streetResultsMany).
+# USAGE: python -m montex.history convert hands.csv hands.npy     (CSV with a hole,board,ops header -> 8 bytes per hand)
+#        python -m montex.history run hands.npy results/ --trials 20000 --seed 1
+#        results/win.npy, tie.npy, equity.npy, error.npy, hands.npy -> [hand, street] arrays (NaN / 0 where the street was not dealt), exact.npy
+
+import argparse
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from . import simulation
+from .cards import parseCards
+from .engine import streetResultsMany
+from .simulation import SAMPLING_METHODS, potEquity, confidenceHalfWidth
+
+NO_CARD = 255 # card code of a middle card that was not dealt
+HAND_DTYPE = np.dtype([("hole", np.uint8, 2), ("board", np.uint8, 5), ("ops", np.uint8)]) # one recorded hand, card codes as in str_to_card
+STREETS = [["preflop", 0], ["flop", 3], ["turn", 4], ["river", 5]] # [name, # known middle cards]
+CHUNK_HANDS = 10000 # hands read, solved and written at once, bounds memory use
+COLUMNS = {"win": np.float64, "tie": np.float64, "equity": np.float64, "error": np.float64, "hands": np.int64, "exact": np.bool_} # output files
+
+
+
+# Read hands
+def textHands(path, default_ops=1, report=False):
+    # Read a CSV hand history with a hole,board,ops header (board and ops may be blank) one hand at a time
+    # OUTPUT: generator of [line number, HAND_DTYPE record as a tuple] -> hands that cannot be read are skipped (and reported on stderr if report)
+    with open(path, newline="") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            try:
+                hole = parseCards(row["hole"])
+                board = parseCards(row.get("board") or "")
+                ops = int(row.get("ops") or default_ops)
+                if len(hole) != 2 or len(board) > 5 or len(board) in (1, 2) or not 1 <= ops <= 22:
+                    raise ValueError("need 2 pocket cards, 0 / 3 / 4 / 5 middle cards and 1 to 22 opponents")
+                if len(set(hole + board)) != len(hole) + len(board):
+                    raise ValueError("the same card is used twice")
+            except (KeyError, ValueError) as e:
+                if report:
+                    print("line " + str(reader.line_num) + ": skipped, " + repr(e), file=sys.stderr)
+                continue
+            yield [reader.line_num, (hole, board + [NO_CARD]*(5 - len(board)), ops)]
+
+
+def convertHistory(text_path, binary_path, default_ops=1, report=False):
+    # Convert a CSV hand history to the binary format (a .npy file of HAND_DTYPE records), writing through a memory map
+    # report = print the hands that cannot be read on stderr
+    # OUTPUT: number of hands written
+    num_hands = sum(1 for hand in textHands(text_path, default_ops, False)) # first pass only counts, so the file can be made at its full size
+    if num_hands == 0: # nothing to memory-map
+        np.save(binary_path, np.zeros(0, dtype=HAND_DTYPE))
+        return 0
+    out = np.lib.format.open_memmap(binary_path, mode="w+", dtype=HAND_DTYPE, shape=(num_hands,))
+    chunk = []
+    start = 0
+    for num, record in textHands(text_path, default_ops, report):
+        chunk.append(record)
+        if len(chunk) == CHUNK_HANDS:
+            out[start:start + len(chunk)] = chunk
+            start += len(chunk)
+            chunk = []
+    out[start:start + len(chunk)] = chunk
+    out.flush()
+    return num_hands
+
+
+def historyChunks(path, chunk_hands=CHUNK_HANDS, default_ops=1, report=False):
+    # Hands of a binary (.npy, memory-mapped) or CSV hand history, chunk_hands at a time
+    # OUTPUT: [number of hands, generator of HAND_DTYPE arrays]
+    if path.lower().endswith(".npy"):
+        hands = np.load(path, mmap_mode="r")
+        if hands.dtype != HAND_DTYPE:
+            raise ValueError("not a hand history file: " + path)
+        return [len(hands), (hands[start:start + chunk_hands] for start in range(0, len(hands), chunk_hands))]
+
+    def chunks():
+        chunk = []
+        for num, record in textHands(path, default_ops, report):
+            chunk.append(record)
+            if len(chunk) == chunk_hands:
+                yield np.array(chunk, dtype=HAND_DTYPE)
+                chunk = []
+        if chunk:
+            yield np.array(chunk, dtype=HAND_DTYPE)
+    return [sum(1 for hand in textHands(path, default_ops, False)), chunks()]
+
+
+
+# Solve hands
+def chunkEquity(hands, first, trials, seed=None, pool=None, precision=0, sampling="plain", report=False):
+    # Results of every dealt street of a chunk of hands, first = index of the chunk's first hand (street s of hand i is seeded with [seed, i, s])
+    # OUTPUT: dictionary of COLUMNS -> arrays [hand, street], damaged hands are left as streets not dealt (and reported on stderr if report)
+    spots = []
+    places = [] # [hand, street] of each spot
+    for i, hand in enumerate(hands):
+        p_cards = [int(c) for c in hand["hole"]]
+        board = [int(c) for c in hand["board"] if c != NO_CARD]
+        if len(set(p_cards + board)) != len(p_cards) + len(board) or max(p_cards + board) > 51 or not 1 <= hand["ops"] <= 22:
+            if report:
+                print("hand " + str(first + i) + ": skipped, damaged record", file=sys.stderr) # its row stays NaN
+            continue
+        for s, [name, num_board] in enumerate(STREETS):
+            if num_board > len(board):
+                break
+            m_cards = board[:num_board]
+            deck = [c for c in range(52) if c not in p_cards and c not in m_cards]
+            spot_seed = None if seed is None else [seed, first + i, s]
+            spots.append([p_cards, m_cards, deck, int(hand["ops"]), trials, spot_seed, precision, None])
+            places.append([i, s])
+
+    columns = {name: np.zeros((len(hands), len(STREETS)), dtype=dtype) for name, dtype in COLUMNS.items()}
+    for name in ("win", "tie", "equity", "error"):
+        columns[name][:] = np.nan
+    for [i, s], [wins, ties, num_hands, exact, shares, categories] in zip(places, streetResultsMany(spots, pool, sampling)):
+        columns["win"][i, s] = wins / num_hands
+        columns["tie"][i, s] = ties / num_hands
+        columns["equity"][i, s] = potEquity(wins, shares, num_hands)
+        columns["error"][i, s] = 0.0 if exact else confidenceHalfWidth(wins, num_hands)
+        columns["hands"][i, s] = num_hands
+        columns["exact"][i, s] = exact
+    return columns
+
+
+def runHistory(path, out_dir, trials=20000, seed=None, pool=None, precision=0, sampling="plain", chunk_hands=CHUNK_HANDS, default_ops=1, progress=False):
+    # Solve every street of every hand of a hand history and write one .npy column file per result to out_dir (see COLUMNS)
+    # progress = show the hands done so far and the hands skipped on stderr
+    # OUTPUT: dictionary -> # hands, seconds
+    start_time = time.perf_counter()
+    num_hands, chunks = historyChunks(path, chunk_hands, default_ops, progress)
+    os.makedirs(out_dir, exist_ok=True)
+    if num_hands == 0: # nothing to memory-map
+        for name, dtype in COLUMNS.items():
+            np.save(os.path.join(out_dir, name + ".npy"), np.zeros((0, len(STREETS)), dtype=dtype))
+        return {"hands": 0, "seconds": time.perf_counter() - start_time}
+    outputs = {name: np.lib.format.open_memmap(os.path.join(out_dir, name + ".npy"), mode="w+", dtype=dtype, shape=(num_hands, len(STREETS)))
+               for name, dtype in COLUMNS.items()}
+    start = 0
+    for hands in chunks:
+        columns = chunkEquity(hands, start, trials, seed, pool, precision, sampling, progress)
+        for name, out in outputs.items():
+            out[start:start + len(hands)] = columns[name]
+        start += len(hands)
+        if progress:
+            print("\r" + str(start) + " / " + str(num_hands) + " hands", end="", file=sys.stderr, flush=True)
+    if progress:
+        print("", file=sys.stderr)
+    for out in outputs.values():
+        out.flush()
+    return {"hands": num_hands, "seconds": time.perf_counter() - start_time}
+
+
+
+# Command line
+def main(argv=None):
+    # Convert or solve hand histories from the command line, argv = arguments (default: command line arguments)
+    parser = argparse.ArgumentParser(prog="montex.history", description="Bulk equity of recorded Texas Hold 'Em hands.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    convert = commands.add_parser("convert", help="convert a CSV hand history (hole,board,ops header) to the binary format")
+    convert.add_argument("input", help="CSV hand history")
+    convert.add_argument("output", help=".npy file to write")
+    convert.add_argument("--ops", type=int, default=1, help="number of opponents for hands that do not give one (default: 1)")
+    run = commands.add_parser("run", help="equity of every street of every hand, written as one .npy file per column")
+    run.add_argument("input", help="binary (.npy) or CSV hand history")
+    run.add_argument("output", help="directory to write the column files to")
+    run.add_argument("--ops", type=int, default=1, help="number of opponents for CSV hands that do not give one (default: 1)")
+    run.add_argument("--trials", type=int, default=20000, help="most hands to simulate per street (default: 20000)")
+    run.add_argument("--precision", type=float, default=0, help="stop a street once the 95%% confidence half-width of the win rate is this small")
+    run.add_argument("--sampling", choices=SAMPLING_METHODS, default="plain", help="how simulated hands are dealt (default: plain)")
+    run.add_argument("--seed", type=int, default=None, help="seed for repeatable results, street s of hand i uses [seed, i, s]")
+    run.add_argument("--chunk", type=int, default=CHUNK_HANDS, help="hands solved at once (default: " + str(CHUNK_HANDS) + ")")
+    run.add_argument("--workers", type=int, default=simulation.WORKERS, help="number of processes to simulate with (default: all cores)")
+    args = parser.parse_args(argv)
+
+    if args.command == "convert":
+        print(str(convertHistory(args.input, args.output, args.ops, True)) + " hands written to " + args.output, file=sys.stderr)
+        return
+    pool = ProcessPoolExecutor(max_workers=args.workers) if args.workers > 1 else None
+    try:
+        summary = runHistory(args.input, args.output, args.trials, args.seed, pool, args.precision, args.sampling, args.chunk, args.ops, True)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    print(str(summary["hands"]) + " hands in " + "{:.1f}".format(summary["seconds"]) + " seconds", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# MONTEX - Outs
+# ABOUT: Outs and draws on the flop and turn -> the player's hand and chance of winning for every card that can come next.
+# Every runout of the rest of the hand is counted towards each of its cards (the order of the turn and river does not matter at showdown),
+# so a single pass over the runouts, exact when small enough and otherwise simulated, gives the results of all the next cards at once.
+
+from itertools import combinations
+
+import numpy as np
+
+from .cards import card_to_str
+from .engine import checkSpot
+from .evaluator import CARD_KEY_NP, CARD_MASK_NP, handRank, rank_to_text, cardState, flushShifts, stateStrengthBatch
+from .simulation import BATCH_SIZE, EXACT_LIMIT, exactCount, opponentCombos, newDealer, partialShuffle
+from .profiler import tick, tock, count
+
+OUTS_RUNS = 200000 # simulated hands shared between every next card when the runouts are too many to enumerate
+
+
+
+# Next card totals
+def showdownShares(p_score, o_scores):
+    # Result of each showdown for the player, o_scores has one opponent per entry of the last axis
+    # OUTPUT: [wins (0/1), pot shares] -> pot share = 1 for a win, 1/k for a pot split k ways, 0 for a loss
+    o_best = o_scores.max(axis=-1)
+    p_score = np.broadcast_to(p_score, o_best.shape)
+    won = p_score > o_best
+    split = 1 + np.count_nonzero(o_scores == p_score[..., None], axis=-1) # players sharing the pot, 1 unless tied
+    return [won.astype(float), np.where(p_score >= o_best, 1 / split, 0.0)]
+
+
+def addNextCards(totals, runout, wins, shares, num_hands):
+    # Add the results of a batch of runouts to the counter of each card in them
+    # totals = [wins, pot shares, hands] arrays indexed by card code, runout = [runout, card] card codes,
+    # wins / shares = sums over the hands played on each runout, num_hands = hands played on each runout
+    for j in range(runout.shape[1]):
+        totals[0] += np.bincount(runout[:, j], weights=wins, minlength=52)
+        totals[1] += np.bincount(runout[:, j], weights=shares, minlength=52)
+        totals[2] += np.bincount(runout[:, j], minlength=52)*num_hands
+
+
+def nextCardTotals(p_cards, m_cards, deck, num_opponents, num_runs=OUTS_RUNS, rng=None):
+    # Win and pot share counters for each next card, from every deal when there are at most EXACT_LIMIT, otherwise num_runs simulated hands
+    # OUTPUT: [wins, pot shares, hands, True if exact] -> arrays of 52 indexed by card code
+    deck = np.asarray(deck, dtype=np.intp)
+    num_board = 5 - len(m_cards)
+    b_key, b_mask = cardState(list(m_cards)) # known cards are added up once
+    p_key, p_mask = cardState(list(p_cards) + list(m_cards))
+    p_shifts = flushShifts(p_mask, num_board)
+    o_shifts = flushShifts(b_mask, num_board + 2)
+    totals = [np.zeros(52), np.zeros(52), np.zeros(52)]
+    exact = exactCount(len(deck), num_board, num_opponents) <= EXACT_LIMIT
+    
+    if exact: # every runout against every set of opponent hands
+        boards = np.array(list(combinations(range(len(deck)), num_board)), dtype=np.intp)
+        unused = np.ones((len(boards), len(deck)), dtype=bool)
+        unused[np.arange(len(boards))[:, None], boards] = False
+        rest = np.nonzero(unused)[1].reshape(len(boards), -1) # positions left for opponents after each runout
+        o_sets = opponentCombos(len(deck) - num_board, num_opponents)
+        step = max(1, BATCH_SIZE // len(o_sets))
+        for start in range(0, len(boards), step):
+            runout = deck[boards[start:start + step]]
+            r_key = CARD_KEY_NP[runout].sum(axis=1)
+            r_mask = CARD_MASK_NP[runout].sum(axis=1)
+            p_score = stateStrengthBatch(p_key + r_key, p_mask | r_mask, p_shifts)
+            o_cards = deck[rest[start:start + step][:, o_sets]] # [runout, set, opponent, card]
+            o_key = (b_key + r_key)[:, None, None] + CARD_KEY_NP[o_cards].sum(axis=3)
+            o_mask = (b_mask | r_mask)[:, None, None] | CARD_MASK_NP[o_cards].sum(axis=3)
+            wins, shares = showdownShares(p_score[:, None], stateStrengthBatch(o_key, o_mask, o_shifts))
+            addNextCards(totals, runout, wins.sum(axis=1), shares.sum(axis=1), len(o_sets))
+        return totals + [True]
+    
+    if rng is None:
+        rng = np.random.default_rng()
+    num_dealt = 2*num_opponents + num_board
+    dealer = newDealer(deck, min(BATCH_SIZE, num_runs))
+    for start in range(0, num_runs, BATCH_SIZE):
+        n = min(BATCH_SIZE, num_runs - start)
+        dealt = partialShuffle(dealer, n, num_dealt, rng)
+        o_cards = dealt[:, :2*num_opponents].reshape(n, num_opponents, 2)
+        runout = dealt[:, 2*num_opponents:]
+        r_key = CARD_KEY_NP[runout].sum(axis=1)
+        r_mask = CARD_MASK_NP[runout].sum(axis=1)
+        p_score = stateStrengthBatch(p_key + r_key, p_mask | r_mask, p_shifts)
+        o_key = (b_key + r_key)[:, None] + CARD_KEY_NP[o_cards].sum(axis=2)
+        o_mask = (b_mask | r_mask)[:, None] | CARD_MASK_NP[o_cards].sum(axis=2)
+        wins, shares = showdownShares(p_score, stateStrengthBatch(o_key, o_mask, o_shifts))
+        addNextCards(totals, runout, wins, shares, 1)
+    return totals + [False]
+
+
+
+# Outs
+def nextCards(p_cards, m_cards, deck, num_opponents, num_runs=OUTS_RUNS, seed=None):
+    # Every card that can come next on the flop or turn with the player's hand rank once it is dealt and the results from then on
+    # p_cards = player pocket cards, m_cards = flop (3) or flop and turn (4), deck = cards still unseen
+    # OUTPUT: list of [card, hand rank, win rate, pot equity, # hands] for each card of deck, best pot equity first
+    if len(m_cards) not in (3, 4):
+        raise ValueError("outs need the flop or the turn, got " + str(len(m_cards)) + " middle cards")
+    start_time = tick()
+    wins, shares, hands, exact = nextCardTotals(p_cards, m_cards, deck, num_opponents, num_runs, np.random.default_rng(seed))
+    tock("outs", start_time)
+    count("outs hands", int(hands.sum()) // (5 - len(m_cards))) # every hand was counted for each of its runout cards
+    known = list(p_cards) + list(m_cards)
+    cards = [[c, handRank(known + [c])[0], float(wins[c] / hands[c]), float(shares[c] / hands[c]), int(hands[c])] for c in deck if hands[c] > 0]
+    cards.sort(key=lambda o: -o[3])
+    return cards
+
+
+def outs(hole, board, ops=1, trials=OUTS_RUNS, seed=None):
+    # Outs of the pocket cards hole against ops random opponents on a flop or turn board, ex: outs("AH KH", "2H 7H 9D", ops=2)
+    # OUTPUT: dictionary -> current hand rank, pot equity now, True if exact, and for each next card its hand rank, win rate, pot equity,
+    #         the change in pot equity and whether it improves the player's hand rank
+    p_cards, m_cards, deck = checkSpot(hole, board, ops, trials)
+    rank = handRank(p_cards + m_cards)[0]
+    cards = nextCards(p_cards, m_cards, deck, ops, trials, seed)
+    equity = sum(o[3]*o[4] for o in cards) / sum(o[4] for o in cards) # every next card weighted by its hands
+    return {
+        "hand": rank_to_text(rank),
+        "equity": equity,
+        "exact": exactCount(len(deck), 5 - len(m_cards), ops) <= EXACT_LIMIT,
+        "cards": {card_to_str(c): {"hand": rank_to_text(r), "improves": bool(r > rank), "win": w, "equity": e, "change": e - equity}
+                  for c, r, w, e, n in cards},
+    }
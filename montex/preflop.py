@@ -0,0 +1,59 @@
+# MONTEX - Preflop Table
+# ABOUT: Saved preflop results for all 169 starting hands against 1-9 opponents, built offline and loaded on first use.
+
+import json
+import os
+
+from .cards import VALUE_CHARS, classCards
+from .simulation import simulateParallel
+
+TABLE_VERSION = 2 # version of the preflop table format and results, tables with another version are ignored
+TABLE_RUNS = 200000 # simulations per starting hand and number of opponents when building the preflop table
+PREFLOP_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "preflop_table.json") # saved preflop table
+
+
+
+# Preflop table
+preflop_table = None # preflop results loaded from PREFLOP_FILE on first use
+
+def buildPreflopTable(num_runs, pool=None):
+    # Simulate all 169 starting hands against 1-9 opponents and save the results to PREFLOP_FILE
+    # each result uses its own fixed seed so the table can be rebuilt exactly
+    # OUTPUT: table dictionary
+    names = []
+    for high in range(12, -1, -1):
+        names.append(VALUE_CHARS[high]*2) # pairs
+        for low in range(high - 1, -1, -1):
+            names.append(VALUE_CHARS[high] + VALUE_CHARS[low] + "s")
+            names.append(VALUE_CHARS[high] + VALUE_CHARS[low] + "o")
+    
+    results = {}
+    for i in range(len(names)):
+        p_cards = classCards(names[i])
+        deck = [c for c in range(52) if c not in p_cards]
+        results[names[i]] = [] # [wins, ties, shares, categories] for 1-9 opponents
+        for ops in range(1, 10):
+            wins, ties, hands, shares, categories = simulateParallel(p_cards, [], deck, ops, num_runs, [TABLE_VERSION, i, ops], pool)
+            results[names[i]].append([wins, ties, shares, categories])
+        print(str(i + 1) + "/" + str(len(names)) + " " + names[i])
+    
+    table = {"version": TABLE_VERSION, "runs": num_runs, "results": results}
+    with open(PREFLOP_FILE, "w") as f:
+        json.dump(table, f, separators=(",", ":"))
+    return table
+
+
+def loadPreflopTable():
+    # Load the preflop table the first time it is needed, an empty table if the file is missing or from another version
+    # OUTPUT: table dictionary
+    global preflop_table
+    if preflop_table is None:
+        preflop_table = {}
+        try:
+            with open(PREFLOP_FILE) as f:
+                table = json.load(f)
+        except (OSError, ValueError):
+            return preflop_table # no table, simulate instead
+        if table.get("version") == TABLE_VERSION:
+            preflop_table = table
+    return preflop_table
@@ -0,0 +1,136 @@
+# MONTEX - Profiling
+# ABOUT: Opt-in timers and counters for each phase of the work (dealing, hand evaluation, showdown, ...), grouped by street.
+# Off by default: the simulation only calls tick() / tock() / count() once per batch of thousands of hands, and they return at once while off.
+# USAGE: enableProfile(), profileStreet("flop"), ... run spots ..., print(profileSummary()), saveProfile("profile.json")
+
+import json
+import time
+
+from .evaluator import rank_to_text
+
+STREET_NAMES = {0: "preflop", 3: "flop", 4: "turn", 5: "river"} # street of each number of known middle cards
+profile_state = [False, "all"] # [on, street being profiled]
+profile_stats = {} # street -> {"seconds": {phase: seconds}, "calls": {phase: # calls}, "counts": {counter: #}, "categories": # final hands of each rank}
+
+
+
+# Settings
+def enableProfile(on=True):
+    # Turn profiling on or off, the numbers recorded so far are kept
+    profile_state[0] = on
+
+
+def profileStreet(street):
+    # Record the following work under this street, ex: "preflop", "flop"
+    profile_state[1] = street
+
+
+def resetProfile():
+    # Forget everything recorded so far
+    profile_stats.clear()
+
+
+
+# Recording
+def streetStats():
+    # Counters of the street being profiled, created when first used
+    # OUTPUT: dictionary (see profile_stats)
+    street = profile_state[1]
+    if street not in profile_stats:
+        profile_stats[street] = {"seconds": {}, "calls": {}, "counts": {}, "categories": [0]*11}
+    return profile_stats[street]
+
+
+def tick():
+    # Start timing a phase
+    # OUTPUT: start time for tock(), 0 while profiling is off
+    return time.perf_counter() if profile_state[0] else 0.0
+
+
+def tock(phase, start):
+    # Add the time since tick() gave start to a phase, returns the time now so the next phase can start from it
+    # OUTPUT: float
+    if not profile_state[0]:
+        return 0.0
+    now = time.perf_counter()
+    stats = streetStats()
+    stats["seconds"][phase] = stats["seconds"].get(phase, 0.0) + now - start
+    stats["calls"][phase] = stats["calls"].get(phase, 0) + 1
+    return now
+
+
+def count(counter, n=1):
+    # Add n to a counter, ex: count("hands", 20000)
+    if profile_state[0]:
+        counts = streetStats()["counts"]
+        counts[counter] = counts.get(counter, 0) + n
+
+
+def countCategories(categories):
+    # Add the player's final hand ranks of a street's results to the histogram, categories[c] = # hands finishing with hand rank c
+    if profile_state[0]:
+        histogram = streetStats()["categories"]
+        for c in range(len(histogram)):
+            histogram[c] += int(categories[c])
+
+
+def takeProfile():
+    # Everything recorded so far (a worker process sends this back with its results), then start again from nothing
+    # OUTPUT: profile_stats dictionary
+    stats = dict(profile_stats)
+    profile_stats.clear()
+    return stats
+
+
+def mergeProfile(stats):
+    # Add the numbers of a worker process (from takeProfile) to the street being profiled here
+    if not profile_state[0]:
+        return
+    here = streetStats()
+    for street in stats.values():
+        for key in ("seconds", "calls", "counts"):
+            for name, value in street[key].items():
+                here[key][name] = here[key].get(name, 0) + value
+        for c in range(len(here["categories"])):
+            here["categories"][c] += street["categories"][c]
+
+
+
+# Reports
+def profileReport():
+    # Everything recorded, ready for json.dump -> hand ranks named (see rank_to_text) and the share of each street's time in each phase
+    # OUTPUT: dictionary -> street -> {"seconds", "calls", "share", "counts", "categories"}
+    report = {}
+    for street, stats in profile_stats.items():
+        total = sum(stats["seconds"].values())
+        report[street] = {
+            "seconds": dict(stats["seconds"]),
+            "calls": dict(stats["calls"]),
+            "share": {phase: (s / total if total else 0.0) for phase, s in stats["seconds"].items()},
+            "counts": dict(stats["counts"]),
+            "categories": {rank_to_text(c): n for c, n in enumerate(stats["categories"]) if c > 0 and n > 0},
+        }
+    return report
+
+
+def profileSummary():
+    # Table of the time spent in each phase of each street, then the counters and hand rank histogram of each street
+    # OUTPUT: string
+    lines = ["{:<10} {:<12} {:>10} {:>8} {:>8}".format("Street", "Phase", "Seconds", "Calls", "Share")]
+    report = profileReport()
+    for street, stats in report.items():
+        for phase, seconds in sorted(stats["seconds"].items(), key=lambda p: -p[1]):
+            lines.append("{:<10} {:<12} {:>10.4f} {:>8} {:>7.1f}%".format(street, phase, seconds, stats["calls"][phase], 100*stats["share"][phase]))
+    for street, stats in report.items():
+        if stats["counts"]:
+            lines.append(street + ": " + ", ".join(name + " " + str(n) for name, n in sorted(stats["counts"].items())))
+        if stats["categories"]:
+            total = sum(stats["categories"].values())
+            lines.append(street + " final hands: " + ", ".join(name + " " + "{:.1f}%".format(100*n / total) for name, n in stats["categories"].items()))
+    return "\n".join(lines)
+
+
+def saveProfile(path):
+    # Write profileReport() to a JSON file
+    with open(path, "w") as f:
+        json.dump(profileReport(), f, indent=1)
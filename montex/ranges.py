@@ -0,0 +1,225 @@
+# MONTEX - Hand Ranges
+# ABOUT: Opponent (and player) hand ranges in the usual notation, ex: "JJ+, AQs+, KQs, AHKH:0.5", and range-vs-range simulation.
+# Each range is precomputed as an array of pocket pairs (combos) with weights, and every deal samples a combo per player from them,
+# redrawing only the deals where two players were given the same card. Players with a random range (every combo, same weight) are not sampled
+# that way -> their cards come from the cards left after the other players', which is the same distribution without any redrawing.
+
+import re
+from math import comb
+
+import numpy as np
+
+from .cards import VALUE_CHARS, str_to_card, card_to_str, parseCards
+from .evaluator import CARD_KEY_NP, CARD_MASK_NP, cardState, flushShifts, stateStrengthBatch
+from .evaluator import rank_to_text
+from .simulation import BATCH_SIZE, confidenceHalfWidth, newTotals, tallyHands, potEquity
+from .profiler import tick, tock, count, countCategories
+
+MAX_REDRAWS = 1000 # rounds of redrawing clashing deals before deciding the ranges cannot be dealt together
+CARD_PATTERN = re.compile(r"^(10|[2-9TJQKA])([CDHS])(10|[2-9TJQKA])([CDHS])$") # one exact combo, ex: AHKH
+
+
+
+# Parse ranges
+def classCombos(high, low, kind):
+    # Every pocket pair of a starting hand, high / low = value index (0 = 2, 12 = Ace), kind = "s" suited, "o" offsuit, "" both
+    # OUTPUT: list of [card, card]
+    if high == low:
+        return [[4*high + a, 4*high + b] for a in range(4) for b in range(a + 1, 4)]
+    combos = []
+    for a in range(4):
+        for b in range(4):
+            if (a == b and kind != "o") or (a != b and kind != "s"):
+                combos.append([4*high + a, 4*low + b])
+    return combos
+
+
+def tokenCombos(token):
+    # Every pocket pair of one range token, ex: "QQ", "JJ+", "22-55", "AQs+", "KTo-K7o", "AK", "AHKH", "random"
+    # OUTPUT: list of [card, card]
+    if token in ("RANDOM", "ANY", "*"):
+        return [[a, b] for a in range(52) for b in range(a + 1, 52)]
+    exact = CARD_PATTERN.match(token)
+    if exact:
+        return [[str_to_card(exact.group(1) + exact.group(2)), str_to_card(exact.group(3) + exact.group(4))]]
+    
+    parts = token.split("-")
+    first = parts[0]
+    if len(first) < 2 or first[0] not in VALUE_CHARS or first[1] not in VALUE_CHARS:
+        raise ValueError("cannot read range token: " + token)
+    high = VALUE_CHARS.index(first[0])
+    low = VALUE_CHARS.index(first[1])
+    kind = first[2:].rstrip("+").lower()
+    if kind not in ("", "s", "o") or (high == low and kind):
+        raise ValueError("cannot read range token: " + token)
+    if high < low:
+        high, low = low, high
+    
+    if len(parts) == 2: # range between two hands with the same first card (or two pairs)
+        last = parts[1]
+        end = VALUE_CHARS.index(last[1]) if len(last) >= 2 and last[1] in VALUE_CHARS else -1
+        if end < 0 or last[0] != (last[1] if high == low else first[0]):
+            raise ValueError("cannot read range token: " + token)
+        lows = range(min(low, end), max(low, end) + 1)
+    elif first.endswith("+"): # this hand and better: higher pairs, or higher second cards below the first
+        lows = range(low, 13 if high == low else high)
+    else:
+        lows = [low]
+    
+    combos = []
+    for l in lows:
+        combos += classCombos(l, l, "") if high == low else classCombos(high, l, kind)
+    return combos
+
+
+def parseRange(text):
+    # Read a range from text of comma separated tokens, each with an optional weight (default 1), ex: "JJ+, AQs+, KQs:0.5, AHKH"
+    # a combo listed more than once keeps the last weight given, a list of tokens can be given instead of text
+    # OUTPUT: [int array of combos [# combos, 2], float array of weights]
+    tokens = text.split(",") if isinstance(text, str) else text
+    weights = {} # (low card, high card) -> weight
+    for token in tokens:
+        token = "".join(str(token).split()).upper() # allow spaces inside tokens, ex: "AH KH"
+        if not token:
+            continue
+        weight = 1.0
+        if ":" in token:
+            token, w = token.split(":")
+            weight = float(w)
+        for combo in tokenCombos(token):
+            weights[tuple(sorted(combo))] = weight
+    
+    combos = [list(c) for c, w in weights.items() if w > 0]
+    if not combos:
+        raise ValueError("empty range: " + str(text))
+    return [np.array(combos, dtype=np.intp), np.array([weights[tuple(c)] for c in combos], dtype=np.float64)]
+
+
+def comboName(combo):
+    # Text of a pocket pair, high card first, ex: "AHKH"
+    # OUTPUT: string
+    return card_to_str(max(combo)) + card_to_str(min(combo))
+
+
+
+# Range vs range simulation
+def sampleCombos(ranges, known_mask, n, rng):
+    # Pick one combo per player for n deals, by weight, redrawing deals where two players share a card
+    # ranges = list of [combos, weights, combo masks, cumulative weights], known_mask = bits of the known middle cards
+    # OUTPUT: int array of combo indexes [n, # players]
+    picks = np.empty((n, len(ranges)), dtype=np.intp)
+    todo = np.arange(n) # deals that still need combos
+    for i in range(MAX_REDRAWS):
+        used = np.full(len(todo), known_mask, dtype=np.int64)
+        clash = np.zeros(len(todo), dtype=bool)
+        for j, [combos, weights, masks, cumulative] in enumerate(ranges):
+            idx = np.searchsorted(cumulative, rng.random(len(todo))*cumulative[-1], side="right")
+            picks[todo, j] = idx
+            clash |= (used & masks[idx]) != 0
+            used |= masks[idx]
+        todo = todo[clash]
+        if len(todo) == 0:
+            return picks
+    raise ValueError("the ranges can (almost) never be dealt together")
+
+
+def rangeEquity(hero, opponents, board=(), trials=100000, seed=None):
+    # Chance of the player's range winning / tying against one range per opponent, ex: rangeEquity("AKs", ["JJ+, AQs+", "random"])
+    # hero / opponents = range text or [combos, weights] from parseRange, board = known middle cards (0-5)
+    # OUTPUT: dictionary -> win / tie / loss rates and pot equity, # hands, 95% confidence half-width of the win rate, rates of split pots and final hands,
+    #         and [# wins, # ties, pots won (split pots as shares), # hands] for each of the player's combos
+    m_cards = parseCards(board)
+    if len(m_cards) > 5:
+        raise ValueError("at most 5 middle cards, got " + str(len(m_cards)))
+    if len(set(m_cards)) != len(m_cards):
+        raise ValueError("the same card is used twice")
+    if len(opponents) < 1 or 2*(len(opponents) + 1) + 5 > 52:
+        raise ValueError("number of opponents must be 1 to 22, got " + str(len(opponents)))
+    if trials < 1:
+        raise ValueError("trials must be at least 1, got " + str(trials))
+    known_mask = 0
+    for c in m_cards:
+        known_mask |= 1 << c
+    
+    ranges = []
+    states = []
+    lookups = {} # player with a random range -> [52, 52] combo index of each pair of cards
+    for r in [hero] + list(opponents):
+        combos, weights = parseRange(r) if isinstance(r, str) else r
+        masks = (np.int64(1) << combos[:, 0]) | (np.int64(1) << combos[:, 1])
+        keep = (masks & known_mask) == 0 # remove combos using a known middle card
+        if not keep.any():
+            raise ValueError("every combo of a range uses a middle card")
+        combos, weights, masks = combos[keep], weights[keep], masks[keep]
+        if len(combos) == comb(52 - len(m_cards), 2) and np.all(weights == weights[0]):
+            lookup = np.zeros((52, 52), dtype=np.intp)
+            lookup[combos[:, 0], combos[:, 1]] = lookup[combos[:, 1], combos[:, 0]] = np.arange(len(combos))
+            lookups[len(ranges)] = lookup
+        ranges.append([combos, weights, masks, np.cumsum(weights)])
+        states.append([CARD_KEY_NP[combos].sum(axis=1), CARD_MASK_NP[combos].sum(axis=1)]) # evaluator state of each combo, added to the board's
+    
+    weighted = [j for j in range(len(ranges)) if j not in lookups] # players sampled by sampleCombos, the others are dealt from the cards left
+    rng = np.random.default_rng(seed)
+    num_board = 5 - len(m_cards)
+    b_key, b_mask = cardState(m_cards) # known middle cards are added up once
+    shifts = flushShifts(b_mask, num_board + 2)
+    totals = newTotals(len(ranges) - 1)
+    wins = np.zeros(len(ranges[0][0])) # counters for each of the player's combos
+    ties = np.zeros(len(ranges[0][0]))
+    pots = np.zeros(len(ranges[0][0])) # pots won, split pots counting as a share
+    hands = np.zeros(len(ranges[0][0]))
+    for start in range(0, trials, BATCH_SIZE):
+        n = min(BATCH_SIZE, trials - start)
+        
+        # Deal Cards
+        start_time = tick()
+        picks = np.empty((n, len(ranges)), dtype=np.intp)
+        if weighted:
+            picks[:, weighted] = sampleCombos([ranges[j] for j in weighted], known_mask, n, rng)
+        keys = rng.random((n, 52))
+        keys[:, m_cards] = 2.0
+        if weighted:
+            pocket = np.stack([ranges[j][0][picks[:, j]] for j in weighted], axis=1) # [deal, player, card]
+            keys[np.arange(n)[:, None], pocket.reshape(n, -1)] = 2.0
+        # random range players' cards, then the rest of the middle, from the cards nobody holds -> unused cards get the smallest random keys
+        order = np.argsort(keys, axis=1)[:, :2*len(lookups) + num_board]
+        for k, [j, lookup] in enumerate(lookups.items()):
+            picks[:, j] = lookup[order[:, 2*k], order[:, 2*k + 1]]
+        runout = order[:, 2*len(lookups):]
+        r_key = b_key + CARD_KEY_NP[runout].sum(axis=1)
+        r_mask = b_mask | CARD_MASK_NP[runout].sum(axis=1)
+        key = r_key[:, None] + np.stack([states[j][0][picks[:, j]] for j in range(len(ranges))], axis=1)
+        mask = r_mask[:, None] | np.stack([states[j][1][picks[:, j]] for j in range(len(ranges))], axis=1)
+        start_time = tock("deal", start_time)
+        
+        # Evaluate Winning Hands
+        scores = stateStrengthBatch(key, mask, shifts) # [deal, player]
+        start_time = tock("evaluate", start_time)
+        tallyHands(totals, scores[:, 0], scores[:, 1:])
+        o_best = scores[:, 1:].max(axis=1)
+        won = scores[:, 0] > o_best
+        tied = scores[:, 0] == o_best
+        split = 1 + np.count_nonzero(scores[:, 1:] == scores[:, :1], axis=1) # players sharing the pot
+        hero_idx = picks[:, 0]
+        wins += np.bincount(hero_idx, weights=won, minlength=len(wins))
+        ties += np.bincount(hero_idx, weights=tied, minlength=len(ties))
+        pots += np.bincount(hero_idx, weights=won + tied / split, minlength=len(pots))
+        hands += np.bincount(hero_idx, minlength=len(hands))
+        tock("showdown", start_time)
+        count("hands", n)
+        count("evaluations", n*len(ranges))
+    
+    shares = totals[2].tolist()
+    categories = totals[3].tolist()
+    countCategories(categories)
+    return {
+        "win": totals[0] / trials,
+        "tie": totals[1] / trials,
+        "loss": (trials - totals[0] - totals[1]) / trials,
+        "equity": potEquity(totals[0], shares, trials),
+        "hands": trials,
+        "error": float(confidenceHalfWidth(totals[0], trials)),
+        "split": {str(k): shares[k] / trials for k in range(2, len(shares)) if shares[k]},
+        "final": {rank_to_text(c): categories[c] / trials for c in range(1, 11) if categories[c]},
+        "combos": {comboName(ranges[0][0][i]): [int(wins[i]), int(ties[i]), round(float(pots[i]), 3), int(hands[i])] for i in range(len(hands)) if hands[i] > 0},
+    }
@@ -0,0 +1,68 @@
+# MONTEX - Sampling Measurement
+# ABOUT: How much each variance reduction method of the simulation (see SAMPLING_METHODS / sampledDeal) gains over plain random deals on a spot,
+# measured from many independent simulations with each method -> variance of the win rate and pot equity, and the time they took.
+# USAGE: python -m montex.sampling "AH KH" "2H 7H 9D" --ops 3 --trials 20000 --replicates 40 --seed 1
+
+import argparse
+import time
+
+import numpy as np
+
+from .engine import checkSpot
+from .simulation import SAMPLING_METHODS, simulate, potEquity
+
+
+
+# Measure
+def measureSampling(hole, board=(), ops=1, trials=20000, replicates=40, seed=None, methods=SAMPLING_METHODS):
+    # Simulate the spot replicates times with trials hands for each method, every simulation with its own random stream
+    # OUTPUT: dictionary -> method -> mean and standard deviation of the win rate and pot equity, seconds per simulation,
+    #         "reduction" = plain variance / method variance of the pot equity (trials saved for the same precision)
+    #         and "efficiency" = reduction after paying for the extra time of the method
+    p_cards, m_cards, deck = checkSpot(hole, board, ops, trials)
+    seeds = np.random.SeedSequence(seed).spawn(len(methods))
+    report = {}
+    for method, method_seed in zip(methods, seeds):
+        wins = []
+        pots = []
+        start_time = time.perf_counter()
+        for replicate_seed in method_seed.spawn(replicates):
+            num_wins, num_ties, shares, categories = simulate(p_cards, m_cards, deck, ops, trials, np.random.default_rng(replicate_seed), method)
+            wins.append(num_wins / trials)
+            pots.append(potEquity(num_wins, shares, trials))
+        report[method] = {
+            "win": float(np.mean(wins)),
+            "win_sd": float(np.std(wins, ddof=1)),
+            "equity": float(np.mean(pots)),
+            "equity_sd": float(np.std(pots, ddof=1)),
+            "seconds": (time.perf_counter() - start_time) / replicates,
+        }
+
+    plain = report.get("plain")
+    for method in report.values():
+        if plain is not None and method["equity_sd"] > 0:
+            method["reduction"] = (plain["equity_sd"] / method["equity_sd"])**2
+            method["efficiency"] = method["reduction"]*plain["seconds"] / method["seconds"]
+    return report
+
+
+def main(argv=None):
+    # Measure the sampling methods on one spot from the command line and print a table
+    parser = argparse.ArgumentParser(prog="montex.sampling", description="Variance reduction of each sampling method against plain random deals.")
+    parser.add_argument("hole", help="pocket cards, ex: \"AH KH\"")
+    parser.add_argument("board", nargs="?", default="", help="known middle cards, ex: \"2H 7H 9D\"")
+    parser.add_argument("--ops", type=int, default=1, help="number of opponents (default: 1)")
+    parser.add_argument("--trials", type=int, default=20000, help="hands per simulation (default: 20000)")
+    parser.add_argument("--replicates", type=int, default=40, help="simulations per method (default: 40)")
+    parser.add_argument("--seed", type=int, default=None, help="seed for repeatable results")
+    args = parser.parse_args(argv)
+
+    report = measureSampling(args.hole, args.board, args.ops, args.trials, args.replicates, args.seed)
+    print("{:<12} {:>9} {:>9} {:>9} {:>10} {:>10} {:>9}".format("Sampling", "Equity", "Std Err", "Win", "Reduction", "Efficiency", "Seconds"))
+    for method, r in report.items():
+        print("{:<12} {:>8.3f}% {:>8.3f}% {:>8.3f}% {:>9.2f}x {:>9.2f}x {:>9.4f}".format(
+            method, 100*r["equity"], 100*r["equity_sd"], 100*r["win"], r.get("reduction", 0), r.get("efficiency", 0), r["seconds"]))
+
+
+if __name__ == "__main__":
+    main()
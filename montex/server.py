@@ -0,0 +1,254 @@
+# MONTEX - Equity Server
+# ABOUT: Long-running local service answering equity requests over HTTP (TCP or a Unix socket). The worker pool, preflop table and result cache
+# stay warm between requests, and requests arriving together are solved as one batch sharing the workers (see streetResultsMany).
+# USAGE: python -m montex.server --port 8765 (or --unix /tmp/montex.sock)
+#        POST /equity {"hole": "AH KH", "board": "2C 7C 9D", "ops": 3, "trials": 100000} -> equity() dictionary, {"spots": [...]} -> list of them
+#        opponent ranges instead of random hands -> {"hole": "AKs", "ranges": ["JJ+, AQs+", "random"]} (no sampling, precision or max_time),
+#        "sampling": "halton" -> see SAMPLING_METHODS
+#        GET /stats -> requests, batches and cache counters, GET /health -> {"ok": true}
+
+import argparse
+import asyncio
+import json
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from http import HTTPStatus
+
+from . import simulation
+from .cache import result_cache, cache_stats, loadCache, saveCache
+from .engine import checkSpot, resultSummary, streetResultsMany
+from .preflop import loadPreflopTable
+from .ranges import rangeEquity
+from .simulation import SAMPLING_METHODS
+
+BATCH_WINDOW = 0.005 # seconds to wait for more requests before solving a batch
+MAX_BATCH = 256 # most spots solved in one batch
+MAX_TRIALS = 10000000 # most hands one spot can ask for, bounds how long a batch can hold the workers
+MAX_RANGE_TRIALS = 1000000 # most hands one range spot can ask for, range spots are simulated one at a time on their own thread
+RANGE_UNUSED = ["sampling", "precision", "max_time"] # spot fields range spots cannot use
+MAX_BODY = 1 << 20 # largest request body in bytes
+
+server_state = {"pool": None, "solver": None, "ranges": None, "queue": None, "requests": 0, "spots": 0, "batches": 0, "started": 0.0}
+
+
+
+# Solving
+async def solveSpot(spot):
+    # Equity of one spot of a request, random opponents are queued for the next batch, ranges are simulated on their own thread
+    # (rangeEquity does not use the cache, so it does not hold up the batches of the solver thread)
+    # OUTPUT: equity() or rangeEquity() dictionary
+    loop = asyncio.get_running_loop()
+    trials = min(int(spot.get("trials", 100000)), MAX_RANGE_TRIALS if spot.get("ranges") else MAX_TRIALS)
+    if trials < 1:
+        raise ValueError("trials must be at least 1, got " + str(trials))
+    max_time = spot.get("max_time")
+    if max_time is not None:
+        max_time = float(max_time)
+    seed = spot.get("seed")
+    if spot.get("ranges"):
+        unused = [name for name in RANGE_UNUSED if name in spot]
+        if unused:
+            raise ValueError("range spots cannot use " + ", ".join(unused))
+        return await loop.run_in_executor(server_state["ranges"], rangeEquity, spot["hole"], spot["ranges"], spot.get("board") or "", trials, seed)
+
+    p_cards, m_cards, deck = checkSpot(spot["hole"], spot.get("board") or "", int(spot.get("ops", 1)), trials)
+    sampling = spot.get("sampling", "plain")
+    if sampling not in SAMPLING_METHODS:
+        raise ValueError("sampling must be one of " + ", ".join(SAMPLING_METHODS))
+    future = loop.create_future()
+    await server_state["queue"].put([[p_cards, m_cards, deck, int(spot.get("ops", 1)), trials, seed,
+                                      float(spot.get("precision", 0)), max_time], sampling, future])
+    return resultSummary(await future)
+
+
+async def solveBatches():
+    # Solve queued spots in batches for as long as the server runs -> waits BATCH_WINDOW after the first spot so others can join it
+    # each batch runs on the solver thread (one at a time, so the cache is only used from one thread) and shares the worker pool
+    loop = asyncio.get_running_loop()
+    queue = server_state["queue"]
+    while True:
+        items = [await queue.get()]
+        await asyncio.sleep(BATCH_WINDOW)
+        while not queue.empty() and len(items) < MAX_BATCH:
+            items.append(queue.get_nowait())
+        server_state["batches"] += 1
+        for sampling in set(item[1] for item in items): # spots with the same sampling method are simulated together
+            group = [item for item in items if item[1] == sampling]
+            try:
+                results = await loop.run_in_executor(server_state["solver"], streetResultsMany, [item[0] for item in group], server_state["pool"], sampling)
+            except Exception: # solve the spots one by one instead, so a bad spot only fails its own request
+                for spot, sampling, future in group:
+                    try:
+                        result = (await loop.run_in_executor(server_state["solver"], streetResultsMany, [spot], server_state["pool"], sampling))[0]
+                    except Exception as e:
+                        if not future.done():
+                            future.set_exception(e)
+                        continue
+                    if not future.done():
+                        future.set_result(result)
+                continue
+            for [spot, sampling, future], result in zip(group, results):
+                if not future.done(): # client may have gone
+                    future.set_result(result)
+
+
+def serverStats():
+    # Counters of the running server
+    # OUTPUT: dictionary
+    return {
+        "requests": server_state["requests"],
+        "spots": server_state["spots"],
+        "batches": server_state["batches"],
+        "uptime": time.time() - server_state["started"],
+        "cache_size": len(result_cache),
+        "cache_hits": cache_stats[0],
+        "cache_misses": cache_stats[1],
+        "workers": simulation.poolSize(server_state["pool"]),
+    }
+
+
+
+# HTTP
+async def readRequest(reader):
+    # Read one HTTP request from a connection
+    # OUTPUT: [method, path, headers, body] or None when the client closed the connection
+    line = await reader.readline()
+    if not line.strip():
+        return None
+    method, path = line.decode("latin-1").split()[:2]
+    headers = {}
+    while True:
+        header = await reader.readline()
+        if header in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = header.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", 0))
+    if length > MAX_BODY:
+        raise ValueError("request body too large")
+    body = await reader.readexactly(length) if length else b""
+    return [method, path.split("?")[0], headers, body]
+
+
+async def answerRequest(method, path, body):
+    # Route a request
+    # OUTPUT: [HTTP status, JSON-ready body]
+    if path == "/health":
+        return [HTTPStatus.OK, {"ok": True}]
+    if path == "/stats":
+        return [HTTPStatus.OK, serverStats()]
+    if path != "/equity":
+        return [HTTPStatus.NOT_FOUND, {"error": "unknown path " + path}]
+    if method != "POST":
+        return [HTTPStatus.METHOD_NOT_ALLOWED, {"error": "POST a spot to /equity"}]
+
+    try:
+        request = json.loads(body)
+        if not isinstance(request, dict):
+            raise ValueError("the request must be a JSON object, got " + type(request).__name__)
+        spots = request["spots"] if "spots" in request else [request]
+        if not isinstance(spots, list) or not all(isinstance(spot, dict) for spot in spots):
+            raise ValueError("spots must be a list of JSON objects")
+        server_state["spots"] += len(spots)
+        results = await asyncio.gather(*(solveSpot(spot) for spot in spots))
+    except (KeyError, ValueError, TypeError) as e: # bad spot, json.JSONDecodeError is a ValueError
+        return [HTTPStatus.BAD_REQUEST, {"error": repr(e)}]
+    return [HTTPStatus.OK, results if "spots" in request else results[0]]
+
+
+async def handleConnection(reader, writer):
+    # Answer the requests of one client connection until it closes it (HTTP/1.1 keep-alive)
+    try:
+        while True:
+            try:
+                request = await readRequest(reader)
+            except (ValueError, asyncio.IncompleteReadError) as e:
+                request = None
+                status, body = [HTTPStatus.BAD_REQUEST, {"error": repr(e)}]
+                keep_alive = False
+            else:
+                if request is None:
+                    break
+                method, path, headers, data = request
+                server_state["requests"] += 1
+                try:
+                    status, body = await answerRequest(method, path, data)
+                except Exception as e: # answer anyway, the connection and the server carry on
+                    status, body = [HTTPStatus.INTERNAL_SERVER_ERROR, {"error": repr(e)}]
+                keep_alive = headers.get("connection", "").lower() != "close"
+
+            data = json.dumps(body).encode()
+            head = ("HTTP/1.1 " + str(status.value) + " " + status.phrase + "\r\nContent-Type: application/json\r\nContent-Length: " +
+                    str(len(data)) + "\r\nConnection: " + ("keep-alive" if keep_alive else "close") + "\r\n\r\n")
+            writer.write(head.encode("latin-1") + data)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except ConnectionError:
+        pass # client went away
+    finally:
+        writer.close()
+
+
+
+# Server
+async def serve(host="127.0.0.1", port=8765, unix_path=None):
+    # Run the server until it is stopped, the worker pool and solver thread must already be in server_state
+    server_state["queue"] = asyncio.Queue()
+    server_state["started"] = time.time()
+    batches = asyncio.create_task(solveBatches())
+    if unix_path:
+        server = await asyncio.start_unix_server(handleConnection, unix_path)
+    else:
+        server = await asyncio.start_server(handleConnection, host, port)
+    stopped = asyncio.get_running_loop().create_future()
+    for sig in (signal.SIGINT, signal.SIGTERM): # stop cleanly so main() can save the cache
+        try:
+            asyncio.get_running_loop().add_signal_handler(sig, lambda: stopped.done() or stopped.set_result(None))
+        except NotImplementedError: # Windows, Ctrl+C still stops the server
+            pass
+    print("montex server on " + (unix_path or host + ":" + str(port)), file=sys.stderr)
+    try:
+        async with server:
+            await stopped
+    finally:
+        batches.cancel()
+
+
+def main(argv=None):
+    # Run the server from the command line, argv = arguments (default: command line arguments)
+    parser = argparse.ArgumentParser(prog="montex.server", description="Texas Hold 'Em equity server.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="port to listen on (default: 8765)")
+    parser.add_argument("--unix", metavar="PATH", help="listen on a Unix socket instead of a port")
+    parser.add_argument("--workers", type=int, default=simulation.WORKERS, help="number of processes to simulate with (default: all cores)")
+    parser.add_argument("--cache", metavar="FILE", help="file to load cached results from at start and save them to at exit")
+    args = parser.parse_args(argv)
+
+    # everything slow happens once here instead of on every request
+    if args.cache:
+        loadCache(args.cache)
+    loadPreflopTable()
+    pool = ProcessPoolExecutor(max_workers=args.workers, initializer=simulation.ignoreInterrupt) if args.workers > 1 else None
+    if pool is not None:
+        list(pool.map(abs, range(args.workers))) # start the worker processes now
+    server_state["pool"] = pool
+    server_state["solver"] = ThreadPoolExecutor(max_workers=1)
+    server_state["ranges"] = ThreadPoolExecutor(max_workers=1)
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server_state["solver"].shutdown()
+        server_state["ranges"].shutdown()
+        if pool is not None:
+            pool.shutdown()
+        if args.cache:
+            saveCache(args.cache)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,375 @@
+# MONTEX - Simulation
+# ABOUT: Monte Carlo simulation (vectorized, optionally over worker processes) and exact enumeration of the rest of a hand.
+
+import os
+import signal
+import time
+from itertools import combinations
+from math import comb, factorial
+
+import numpy as np
+
+from .evaluator import CARD_KEY_NP, CARD_MASK_NP, handStrength, cardState, flushShifts, stateStrengthBatch
+from .profiler import profile_state, tick, tock, count, enableProfile, takeProfile, mergeProfile
+
+WORKERS = os.cpu_count() or 1 # default number of processes to share the simulations between
+BATCH_SIZE = 20000 # number of simulations dealt at once, bounds memory use
+CHUNK_RUNS = 25000 # simulations per parallel task, fixed so totals do not depend on the number of workers
+EXACT_LIMIT = 2000000 # largest number of possible deals to enumerate exactly instead of simulating
+SAMPLING_METHODS = ["plain", "stratified", "antithetic", "halton"] # ways of dealing the simulated hands, see sampledDeal
+PRIMES = [p for p in range(2, 230) if all(p % d for d in range(2, p))] # Halton base of each dealt card, 50 primes -> up to 22 opponents
+
+
+
+# Dealing
+def newDealer(deck, num_rows):
+    # Preallocate num_rows copies of the deck and the scratch arrays partialShuffle needs, reused for every batch of runs
+    # OUTPUT: [decks, random numbers, positions, 2 card buffers, row offsets]
+    num_cards = len(deck)
+    decks = np.tile(np.asarray(deck, dtype=np.intp), (num_rows, 1))
+    return [decks, np.empty(num_rows), np.empty(num_rows, dtype=np.intp), np.empty(num_rows, dtype=np.intp),
+            np.empty(num_rows, dtype=np.intp), np.arange(num_rows, dtype=np.intp)*num_cards]
+
+
+def partialShuffle(dealer, n, num_dealt, rng, first=0, points=None):
+    # Partial Fisher-Yates shuffle of the first n decks of a dealer in place: card i of each row is swapped with a random card from i on,
+    # for the num_dealt positions actually dealt. A partial shuffle of any order is uniformly random, so decks are never reset
+    # first = positions already dealt, points = [n, num_dealt] numbers in [0, 1) to pick the cards with instead of random ones
+    # OUTPUT: view [n, num_dealt] of the dealt cards
+    decks, u, j, top, pick, offsets = [a[:n] for a in dealer]
+    num_cards = decks.shape[1]
+    flat = decks.reshape(-1) # view for flat indexing without copies
+    for i in range(first, num_dealt):
+        if points is None:
+            rng.random(out=u)
+        else:
+            np.copyto(u, points[:, i])
+        np.multiply(u, num_cards - i, out=u)
+        np.copyto(j, u, casting="unsafe") # random position from i to the end of the row ...
+        j += offsets
+        j += i # ... as a flat index
+        np.copyto(top, decks[:, i])
+        np.take(flat, j, out=pick)
+        decks[:, i] = pick
+        np.put(flat, j, top)
+    return decks[:, :num_dealt]
+
+
+def haltonPoints(first, n, dims, shift):
+    # Points first + 1 to first + n of the Halton low-discrepancy sequence (radical inverse of the index in base PRIMES[d] for dimension d),
+    # moved by a random shift (mod 1) so that every point is still uniformly random but the points together cover [0, 1) evenly
+    # OUTPUT: array [n, dims]
+    index = np.arange(first + 1, first + n + 1, dtype=np.int64)
+    points = np.empty((n, dims))
+    for d in range(dims):
+        base = PRIMES[d]
+        rest = index.copy()
+        digit = 1.0
+        x = np.zeros(n)
+        while rest.any():
+            digit /= base
+            x += digit*(rest % base)
+            rest //= base
+        points[:, d] = x
+    points += shift
+    return np.mod(points, 1.0, out=points)
+
+
+def sampledDeal(dealer, n, num_dealt, num_board, deck, first, rng, sampling, shift=None):
+    # Deal n hands with a variance reduction method, the middle cards first -> they decide most showdowns, so they get the best spread
+    # "stratified" = the first middle card cycles through deck (every card equally often, starting from card shift) and the rest are random,
+    # "antithetic" = hands in pairs dealt with random numbers u and 1 - u, "halton" = numbers from haltonPoints (shift = random shift)
+    # first = number of hands dealt before this batch, so the strata / Halton points carry on from the last batch
+    # decks start again from deck every batch, so the same numbers always deal the same cards (the numbers of different hands are related)
+    # OUTPUT: view [n, num_dealt] of the dealt cards, num_board middle cards then the opponents' cards
+    decks = dealer[0]
+    decks[:n] = deck
+    if sampling == "stratified" and num_board > 0:
+        rows = np.arange(n)
+        cards = np.asarray(deck, dtype=np.intp)[(shift + first + rows) % len(deck)] # card of each hand's stratum
+        place = np.argmax(decks[:n] == cards[:, None], axis=1) # where the card is now in each deck
+        decks[rows, place] = decks[rows, 0]
+        decks[rows, 0] = cards
+        return partialShuffle(dealer, n, num_dealt, rng, first=1)
+    if sampling == "antithetic":
+        half = n // 2
+        points = np.empty((n, num_dealt))
+        rng.random(out=points[:half])
+        np.subtract(1.0, points[:half], out=points[half:2*half])
+        rng.random(out=points[2*half:])
+        return partialShuffle(dealer, n, num_dealt, rng, points=points)
+    if sampling == "halton":
+        return partialShuffle(dealer, n, num_dealt, rng, points=haltonPoints(first, n, num_dealt, shift))
+    return partialShuffle(dealer, n, num_dealt, rng)
+
+
+
+# Showdown counters
+def newTotals(num_opponents):
+    # Empty showdown counters -> [# wins, # ties, shares, categories]
+    # shares[k] = # ties where the pot is split between k players, categories[c] = # hands where the player finishes with hand rank c (see rank_to_text)
+    # OUTPUT: list
+    return [0, 0, np.zeros(num_opponents + 2, dtype=np.int64), np.zeros(11, dtype=np.int64)]
+
+
+def tallyHands(totals, p_score, o_scores):
+    # Add a batch of showdowns to the counters of newTotals, o_scores has one opponent per entry of the last axis
+    o_best = o_scores.max(axis=-1)
+    p_score = np.broadcast_to(p_score, o_best.shape)
+    tied = p_score == o_best
+    totals[0] += int(np.count_nonzero(p_score > o_best))
+    totals[1] += int(np.count_nonzero(tied))
+    split = 1 + np.count_nonzero(o_scores[tied] == p_score[tied][:, None], axis=-1) # players sharing each tied pot
+    totals[2] += np.bincount(split, minlength=len(totals[2]))
+    totals[3] += np.bincount((p_score >> 20).ravel(), minlength=11)
+
+
+def potEquity(num_wins, shares, num_hands):
+    # Share of the pot the player expects to win -> (wins + split pots divided between the players sharing them) / hands
+    # OUTPUT: float
+    return (num_wins + sum(shares[k] / k for k in range(2, len(shares)))) / num_hands
+
+
+
+# Vectorized simulation
+def simulate(p_cards, m_cards, deck, num_opponents, num_runs, rng=None, sampling="plain"):
+    # Monte Carlo simulation of the rest of the hand, dealing every run at once as rows of a preallocated integer array
+    # p_cards = player pocket cards, m_cards = known middle cards (0-5), deck = cards still unseen
+    # sampling = "plain" random deals or a variance reduction method of sampledDeal (see SAMPLING_METHODS)
+    # OUTPUT: [# wins, # ties, shares, categories] over num_runs hands (see newTotals)
+    if sampling not in SAMPLING_METHODS:
+        raise ValueError("sampling must be one of " + ", ".join(SAMPLING_METHODS) + ", got " + str(sampling))
+    if rng is None:
+        rng = np.random.default_rng()
+    deck = np.asarray(deck, dtype=np.intp)
+    m_cards = np.asarray(m_cards, dtype=np.intp)
+    num_board = 5 - len(m_cards) # middle cards still to come
+    num_dealt = 2*num_opponents + num_board # cards drawn from the deck in each run
+    
+    # known cards are added up once, each run only adds the cards dealt to it
+    b_key, b_mask = cardState(m_cards.tolist()) # known middle cards, shared by every opponent
+    p_key, p_mask = cardState(list(p_cards) + m_cards.tolist())
+    p_shifts = flushShifts(p_mask, num_board) # suits that can still make a flush
+    o_shifts = flushShifts(b_mask, num_board + 2)
+    # player score does not change between runs once the middle is known
+    p_fixed = handStrength(list(p_cards) + m_cards.tolist()) if num_board == 0 else None
+    
+    totals = newTotals(num_opponents)
+    dealer = newDealer(deck, min(BATCH_SIZE, num_runs))
+    # one random shift of the Halton points / first stratum for the whole simulation, so chunks do not all favour the same cards
+    shift = rng.random(num_dealt) if sampling == "halton" else int(rng.integers(len(deck))) if sampling == "stratified" else None
+    for start in range(0, num_runs, BATCH_SIZE): # limit memory by dealing BATCH_SIZE runs at a time
+        n = min(BATCH_SIZE, num_runs - start)
+        
+        # Deal Cards
+        start_time = tick()
+        if sampling == "plain":
+            dealt = partialShuffle(dealer, n, num_dealt, rng)
+            o_cards = dealt[:, :2*num_opponents].reshape(n, num_opponents, 2) # opponents' cards
+            runout = dealt[:, 2*num_opponents:] # rest of the middle cards
+        else:
+            dealt = sampledDeal(dealer, n, num_dealt, num_board, deck, start, rng, sampling, shift)
+            runout = dealt[:, :num_board]
+            o_cards = dealt[:, num_board:].reshape(n, num_opponents, 2)
+        r_key = CARD_KEY_NP[runout].sum(axis=1)
+        r_mask = CARD_MASK_NP[runout].sum(axis=1)
+        o_key = (b_key + r_key)[:, None] + CARD_KEY_NP[o_cards].sum(axis=2)
+        o_mask = (b_mask | r_mask)[:, None] | CARD_MASK_NP[o_cards].sum(axis=2)
+        start_time = tock("deal", start_time)
+        
+        # Evaluate Winning Hands
+        if p_fixed is None:
+            p_score = stateStrengthBatch(p_key + r_key, p_mask | r_mask, p_shifts)
+        else:
+            p_score = p_fixed
+        o_scores = stateStrengthBatch(o_key, o_mask, o_shifts)
+        start_time = tock("evaluate", start_time)
+        tallyHands(totals, p_score, o_scores)
+        tock("showdown", start_time)
+        count("hands", n)
+        count("evaluations", n*(num_opponents + (p_fixed is None)))
+    
+    return [totals[0], totals[1], totals[2].tolist(), totals[3].tolist()]
+    
+    
+# Parallel simulation
+def simulateChunk(task):
+    # Simulate one chunk of runs, task = [p_cards, m_cards, deck, num_opponents, num_runs, seed, sampling, profile]
+    # profile = True / False to profile in a worker process or not (whatever earlier chunks of the worker did), None when simulated here
+    # OUTPUT: [# wins, # ties, shares, categories, profile of the chunk (None unless asked for)]
+    p_cards, m_cards, deck, num_opponents, num_runs, seed, sampling, profile = task
+    if profile is not None: # in a worker process, profile like the main process and send the worker's numbers back with the results
+        enableProfile(profile)
+        takeProfile()
+    result = simulate(p_cards, m_cards, deck, num_opponents, num_runs, np.random.default_rng(seed), sampling)
+    return result + [takeProfile() if profile else None]
+
+
+def confidenceHalfWidth(num_wins, num_hands):
+    # Half-width of the 95% confidence interval of the win rate after num_hands simulated hands
+    # OUTPUT: float
+    win_pct = num_wins / num_hands
+    return 1.96*np.sqrt(win_pct*(1 - win_pct)/num_hands)
+
+
+def simulateParallel(p_cards, m_cards, deck, num_opponents, num_runs, seed=None, pool=None, precision=0, max_time=None, sampling="plain"):
+    # Simulate up to num_runs hands in CHUNK_RUNS sized chunks, each with its own seed stream, on the worker pool (or here if pool is None)
+    # stops early once the 95% confidence half-width of the win rate is at most precision, or after max_time seconds
+    # chunks are added up in order and the stop is checked after each one, so the totals are the same for any number of workers
+    # sampling = how each chunk deals its hands (see simulate)
+    # OUTPUT: [# wins, # ties, # hands, shares, categories]
+    for totals in simulateStream(p_cards, m_cards, deck, num_opponents, num_runs, seed, pool, precision, max_time, sampling):
+        pass
+    return totals
+
+
+def simulateStream(p_cards, m_cards, deck, num_opponents, num_runs, seed=None, pool=None, precision=0, max_time=None, sampling="plain"):
+    # Same simulation as simulateParallel, giving the running totals after every chunk so results can be shown while they improve
+    # the caller can stop at any time by no longer asking for results, the last totals given are simulateParallel's result
+    # OUTPUT: generator of [# wins, # ties, # hands, shares, categories]
+    start_time = time.perf_counter()
+    seeds = np.random.SeedSequence(seed)
+    round_size = poolSize(pool) # chunks sent out at once
+    totals = [0, 0, 0, [0]*(num_opponents + 2), [0]*11]
+    
+    while totals[2] < num_runs:
+        # next round of chunks
+        sizes = []
+        queued = totals[2]
+        while len(sizes) < round_size and queued < num_runs:
+            sizes.append(min(CHUNK_RUNS, num_runs - queued))
+            queued += sizes[-1]
+        chunk_seeds = seeds.spawn(len(sizes)) # independent random stream for each chunk, continuing the same sequence
+        remote = pool is not None and len(sizes) > 1
+        tasks = [[list(p_cards), list(m_cards), list(deck), num_opponents, n, ss, sampling, profile_state[0] if remote else None] for n, ss in zip(sizes, chunk_seeds)]
+        if remote:
+            chunks = pool.map(simulateChunk, tasks)
+        else:
+            chunks = map(simulateChunk, tasks)
+        
+        for result, n in zip(chunks, sizes): # add up results in task order
+            totals[0] += result[0]
+            totals[1] += result[1]
+            totals[2] += n
+            totals[3] = [a + b for a, b in zip(totals[3], result[2])]
+            totals[4] = [a + b for a, b in zip(totals[4], result[3])]
+            if result[4] is not None:
+                mergeProfile(result[4])
+            yield list(totals)
+            if precision > 0 and confidenceHalfWidth(totals[0], totals[2]) <= precision:
+                return # precise enough, later chunks of the round are not used
+        if max_time is not None and time.perf_counter() - start_time > max_time:
+            return # out of time
+
+
+def simulateMany(spots, pool=None, sampling="plain"):
+    # simulateParallel for several spots at once without stopping early, spots = list of [p_cards, m_cards, deck, num_opponents, num_runs, seed]
+    # every chunk of every spot goes to the worker pool together, so small spots share the workers instead of waiting for each other
+    # chunks and seeds are the same as simulateParallel's, so each spot gets the same totals as simulating it alone
+    # OUTPUT: list of [# wins, # ties, # hands, shares, categories], one per spot
+    tasks = []
+    owners = [] # spot of each task
+    for i, [p_cards, m_cards, deck, num_opponents, num_runs, seed] in enumerate(spots):
+        sizes = [min(CHUNK_RUNS, num_runs - start) for start in range(0, num_runs, CHUNK_RUNS)]
+        chunk_seeds = np.random.SeedSequence(seed).spawn(len(sizes)) # spawning all at once gives the same seeds as round by round
+        for n, ss in zip(sizes, chunk_seeds):
+            tasks.append([list(p_cards), list(m_cards), list(deck), num_opponents, n, ss, sampling])
+            owners.append(i)
+    remote = pool is not None and len(tasks) > 1
+    tasks = [task + [profile_state[0] if remote else None] for task in tasks]
+    if remote:
+        chunks = pool.map(simulateChunk, tasks)
+    else:
+        chunks = map(simulateChunk, tasks)
+    
+    results = [[0, 0, 0, [0]*(spot[3] + 2), [0]*11] for spot in spots]
+    for result, task, i in zip(chunks, tasks, owners): # add up results in task order
+        totals = results[i]
+        totals[0] += result[0]
+        totals[1] += result[1]
+        totals[2] += task[4]
+        totals[3] = [a + b for a, b in zip(totals[3], result[2])]
+        totals[4] = [a + b for a, b in zip(totals[4], result[3])]
+        if result[4] is not None:
+            mergeProfile(result[4])
+    return results
+
+
+def poolSize(pool):
+    # Number of worker processes of a ProcessPoolExecutor, 1 when there is no pool and everything is simulated here
+    # OUTPUT: int
+    return 1 if pool is None else pool._max_workers
+
+
+def ignoreInterrupt():
+    # Worker process initializer -> leave Ctrl+C to the main process, which stops a stream of results without breaking the pool
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    
+    
+# Exact enumeration
+def exactCount(num_cards, num_board, num_opponents):
+    # Number of different deals of num_board middle cards and num_opponents pocket pairs from num_cards unseen cards
+    # OUTPUT: int
+    count = comb(num_cards, num_board)
+    for i in range(num_opponents):
+        count *= comb(num_cards - num_board - 2*i, 2)
+    return count // factorial(num_opponents) # opponents are interchangeable, only count each set of hands once
+
+
+def opponentCombos(num_cards, num_opponents):
+    # Index every set of num_opponents pocket pairs that can be dealt from num_cards cards (no card used twice)
+    # OUTPUT: int array [# sets, num_opponents, 2] of card positions, O(# sets)
+    pairs = np.array(list(combinations(range(num_cards), 2)), dtype=np.intp) # every pocket pair
+    pair_mask = (np.int64(1) << pairs[:, 0]) | (np.int64(1) << pairs[:, 1]) # bit of each card in the pair
+    sets = np.arange(len(pairs))[:, None] # pair index of each opponent in the set, increasing so each set is listed once
+    set_mask = pair_mask.copy()
+    for i in range(num_opponents - 1):
+        # add every later pair that shares no card with the set
+        ok = (np.arange(len(pairs))[None, :] > sets[:, -1:]) & ((set_mask[:, None] & pair_mask[None, :]) == 0)
+        s, p = np.nonzero(ok)
+        sets = np.concatenate((sets[s], p[:, None]), axis=1)
+        set_mask = set_mask[s] | pair_mask[p]
+    return pairs[sets]
+
+
+def enumerateExact(p_cards, m_cards, deck, num_opponents):
+    # Play out every possible deal of the remaining middle cards and opponent hands (all equally likely)
+    # OUTPUT: [# wins, # ties, # hands, shares, categories]
+    deck = np.asarray(deck, dtype=np.intp)
+    m_cards = np.asarray(m_cards, dtype=np.intp)
+    num_board = 5 - len(m_cards)
+    
+    boards = list(combinations(range(len(deck)), num_board))
+    boards = np.array(boards, dtype=np.intp).reshape(len(boards), num_board) # positions of each runout
+    unused = np.ones((len(boards), len(deck)), dtype=bool)
+    unused[np.arange(len(boards))[:, None], boards] = False
+    rest = np.nonzero(unused)[1].reshape(len(boards), -1) # positions left for opponents after each runout
+    o_sets = opponentCombos(len(deck) - num_board, num_opponents)
+    
+    b_key, b_mask = cardState(m_cards.tolist())
+    p_key, p_mask = cardState(list(p_cards) + m_cards.tolist())
+    p_shifts = flushShifts(p_mask, num_board)
+    o_shifts = flushShifts(b_mask, num_board + 2)
+    
+    totals = newTotals(num_opponents)
+    step = max(1, BATCH_SIZE // len(o_sets)) # runouts evaluated at once
+    for start in range(0, len(boards), step):
+        n = min(step, len(boards) - start)
+        start_time = tick()
+        runout = deck[boards[start:start + n]]
+        r_key = CARD_KEY_NP[runout].sum(axis=1)
+        r_mask = CARD_MASK_NP[runout].sum(axis=1)
+        o_cards = deck[rest[start:start + n][:, o_sets]] # [runout, set, opponent, card]
+        o_key = (b_key + r_key)[:, None, None] + CARD_KEY_NP[o_cards].sum(axis=3)
+        o_mask = (b_mask | r_mask)[:, None, None] | CARD_MASK_NP[o_cards].sum(axis=3)
+        start_time = tock("deal", start_time)
+        
+        p_score = stateStrengthBatch(p_key + r_key, p_mask | r_mask, p_shifts)
+        o_scores = stateStrengthBatch(o_key, o_mask, o_shifts)
+        start_time = tock("evaluate", start_time)
+        tallyHands(totals, p_score[:, None], o_scores)
+        tock("showdown", start_time)
+        count("hands", n*len(o_sets))
+        count("evaluations", n*(1 + len(o_sets)*num_opponents))
+    
+    return [totals[0], totals[1], len(boards)*len(o_sets), totals[2].tolist(), totals[3].tolist()]
@@ -0,0 +1,44 @@
+# MONTEX - Engine Tests
+# USAGE: python -m pytest tests
+
+from montex.cache import result_cache
+from montex.engine import checkSpot, streetResults, streetResultsMany
+
+
+def flopSpot(num_runs, seed, precision=0, max_time=None):
+    # Batch spot of AH KH on a 2C 7C 9D flop against 3 opponents, too many deals to enumerate so it is simulated
+    # OUTPUT: [p_cards, m_cards, deck, num_opponents, num_runs, seed, precision, max_time]
+    p_cards, m_cards, deck = checkSpot("AH KH", "2C 7C 9D", 3, 1)
+    return [p_cards, m_cards, deck, 3, num_runs, seed, precision, max_time]
+
+
+def test_batch_precision_and_max_time():
+    result_cache.clear()
+    spots = [flopSpot(200000, 1, precision=0.01), flopSpot(50000, 2, max_time=60.0), flopSpot(50000, 3)]
+    results = streetResultsMany(spots)
+    assert len(results) == 3
+    assert results[0][2] < 200000 # stopped at the precision
+    assert results[1][2] == 50000 # max_time is a time limit, not a precision
+    assert results[2][2] == 50000
+    for wins, ties, hands, exact, shares, categories in results:
+        assert not exact and 0 < wins < hands
+
+
+def test_batch_matches_one_by_one():
+    result_cache.clear()
+    spots = [flopSpot(50000, 4, precision=0.01), flopSpot(50000, 5, max_time=60.0)]
+    batch = streetResultsMany(spots)
+    result_cache.clear()
+    for spot, result in zip(spots, batch):
+        p_cards, m_cards, deck, num_opponents, num_runs, seed, precision, max_time = spot
+        assert streetResults(p_cards, m_cards, deck, num_opponents, num_runs, seed, None, precision, max_time) == result
+
+
+def test_cache_skips_stopped_and_seeded():
+    result_cache.clear()
+    p_cards, m_cards, deck = checkSpot("AH KH", "2C 7C 9D", 3, 1)
+    assert streetResults(p_cards, m_cards, deck, 3, 2000000, max_time=0.01)[2] < 2000000
+    assert streetResults(p_cards, m_cards, deck, 3, 50000, 2)[2] == 50000
+    assert len(result_cache) == 0 # stopped for time, then seeded
+    streetResults(p_cards, m_cards, deck, 3, 50000)
+    assert len(result_cache) == 1
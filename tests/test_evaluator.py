@@ -0,0 +1,113 @@
+# MONTEX - Evaluator Tests
+# USAGE: python -m pytest tests
+
+from collections import Counter
+from itertools import combinations
+
+import numpy as np
+
+from montex.cards import parseCards
+from montex.evaluator import handStrength, handStrengthBatch, handRank
+
+
+def strength(text):
+    # Strength of a hand given as text, ex: strength("AH KH QH JH TH")
+    # OUTPUT: int
+    return handStrength(parseCards(text))
+
+
+def bestOfFive(hand):
+    # Reference strength by brute force -> best (category, values) over every 5 cards of the hand, compared as tuples
+    # OUTPUT: tuple
+    best = None
+    for five in combinations(hand, 5):
+        values = sorted((c >> 2 for c in five), reverse=True)
+        counts = Counter(values)
+        groups = sorted(counts.items(), key=lambda g: (g[1], g[0]), reverse=True) # most of a value first, then highest value
+        ordered = [v for v, n in groups for i in range(n)]
+        flush = len(set(c & 3 for c in five)) == 1
+        straight = None
+        if len(counts) == 5 and values[0] - values[4] == 4:
+            straight = values[0]
+        elif values == [12, 3, 2, 1, 0]: # wheel, the Ace plays low
+            straight = 3
+        shape = sorted(counts.values(), reverse=True)
+        if straight is not None and flush:
+            score = (8, [straight])
+        elif shape[0] == 4:
+            score = (7, ordered)
+        elif shape == [3, 2]:
+            score = (6, ordered)
+        elif flush:
+            score = (5, values)
+        elif straight is not None:
+            score = (4, [straight])
+        elif shape[0] == 3:
+            score = (3, ordered)
+        elif shape == [2, 2, 1]:
+            score = (2, ordered)
+        elif shape[0] == 2:
+            score = (1, ordered)
+        else:
+            score = (0, values)
+        best = score if best is None or score > best else best
+    return best
+
+
+def test_kicker_decides():
+    assert strength("AH AD KC 7S 2D 3C 9H") > strength("AS AC QC 7D 2H 3S 9D") # pair of Aces, King kicker
+    assert strength("AH KD QC JS 9D 3C 2H") > strength("AS KC QD JH 8D 3S 2C") # high card down to the fifth card
+
+
+def test_kicker_ties_split():
+    board = "AH AD KC QS JD"
+    assert strength(board + " 2C 3C") == strength(board + " 4H 5H") # both play the board
+    assert strength("KH KD 9C 9S 5D 2C 3H") == strength("KS KC 9D 9H 5H 4D 2D") # same two pair, same fifth card
+
+
+def test_third_pair_as_kicker():
+    # three pairs -> the best two, with the third pair's value as the kicker when it beats the last single card
+    assert strength("AH AD KC KS 9D 9C 2H") > strength("AS AC KD KH 8D 8C 2S")
+    assert strength("AH AD KC KS 9D 9C 2H") == strength("AS AC KD KH 9H 3S 2S")
+    assert handRank(parseCards("AH AD KC KS 9D 9C 2H"))[0] == 3
+
+
+def test_two_trips_full_house():
+    hand = parseCards("9H 9D 9C 5S 5D 5C 2H")
+    assert handRank(hand)[0] == 7
+    assert handStrength(hand) > strength("9S 9H 9D 4S 4D 2C 3H") # nines full of fives over nines full of fours
+    assert handStrength(hand) < strength("TH TD TC 2S 2D 7C 8H")
+
+
+def test_wheel_and_steel_wheel():
+    wheel = strength("AH 2D 3C 4S 5D 9C KH")
+    assert handRank(parseCards("AH 2D 3C 4S 5D 9C KH"))[0] == 5
+    assert wheel < strength("2H 3D 4C 5S 6D 9C KH") # six high straight beats the wheel
+    assert wheel > strength("AH AD AC 4S 5D 9C KH") # any straight beats three of a kind
+    steel = strength("AH 2H 3H 4H 5H 9C KD")
+    assert handRank(parseCards("AH 2H 3H 4H 5H 9C KD"))[0] == 9
+    assert steel < strength("2H 3H 4H 5H 6H 9C KD")
+    assert steel > strength("AS AD AC AH 5D 9C KH")
+
+
+def test_flush_beats_straight():
+    assert strength("2H 7H 9H JH KH TD QC") > strength("9D TC JS QH KD 2C 3C")
+    assert handRank(parseCards("2H 7H 9H JH KH TD QC"))[0] == 6
+
+
+def test_matches_brute_force():
+    rng = np.random.default_rng(1)
+    hands = [rng.choice(52, 7, replace=False).tolist() for i in range(3000)]
+    scores = [handStrength(hand) for hand in hands]
+    references = [bestOfFive(hand) for hand in hands]
+    for i in range(len(hands) - 1):
+        a, b = scores[i], scores[i + 1]
+        ra, rb = references[i], references[i + 1]
+        assert (a > b) == (ra > rb) and (a == b) == (ra == rb), (hands[i], hands[i + 1])
+
+
+def test_batch_matches_single():
+    rng = np.random.default_rng(2)
+    hands = np.array([rng.choice(52, 7, replace=False) for i in range(5000)])
+    assert handStrengthBatch(hands).tolist() == [handStrength(hand) for hand in hands.tolist()]
+    assert handStrengthBatch(hands[:, :5]).tolist() == [handStrength(hand) for hand in hands[:, :5].tolist()]
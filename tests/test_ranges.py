@@ -0,0 +1,76 @@
+# MONTEX - Range Tests
+# USAGE: python -m pytest tests
+
+import pytest
+
+from montex.cards import VALUE_CHARS, parseCards, handClass
+from montex.engine import equity
+from montex.ranges import tokenCombos, parseRange, rangeEquity
+
+
+def classes(token):
+    # Starting hand names of a range token's combos, ex: {"AKs", "AQs"}
+    # OUTPUT: set of strings
+    return set(handClass(combo) for combo in tokenCombos(token))
+
+
+def test_pairs_and_better():
+    assert classes("JJ+") == {"JJ", "QQ", "KK", "AA"}
+    assert len(tokenCombos("JJ+")) == 4*6
+    assert classes("22-55") == {"22", "33", "44", "55"}
+    assert classes("55-22") == classes("22-55")
+
+
+def test_suited_and_offsuit():
+    assert classes("AQs+") == {"AQs", "AKs"}
+    assert len(tokenCombos("AQs+")) == 2*4
+    assert classes("KTo-K7o") == {"KTo", "K9o", "K8o", "K7o"}
+    assert len(tokenCombos("KTo-K7o")) == 4*12
+    assert len(tokenCombos("AK")) == 16
+    assert classes("T2s+") == {"T" + VALUE_CHARS[v] + "s" for v in range(8)}
+
+
+def test_exact_combo_and_random():
+    assert tokenCombos("AHKH") == [parseCards("AH KH")]
+    assert len(tokenCombos("RANDOM")) == 1326
+
+
+def test_weights():
+    combos, weights = parseRange("AHKH:0.5, QQ")
+    by_combo = {tuple(sorted(c)): w for c, w in zip(combos.tolist(), weights.tolist())}
+    assert by_combo[tuple(sorted(parseCards("AH KH")))] == 0.5
+    assert len(combos) == 7 and sum(weights) == 6.5
+
+
+def test_last_weight_wins():
+    combos, weights = parseRange("AKs:0.25, AHKH:0.75")
+    by_combo = {tuple(sorted(c)): w for c, w in zip(combos.tolist(), weights.tolist())}
+    assert by_combo[tuple(sorted(parseCards("AH KH")))] == 0.75
+    assert sorted(by_combo.values()) == [0.25, 0.25, 0.25, 0.75]
+    with pytest.raises(ValueError): # the later weight of 0 removes every combo
+        parseRange("QQ, QQ:0")
+
+
+@pytest.mark.parametrize("token", ["AX", "QQs", "AKx", "AK-QJ", "22-5", "A", "AK:"])
+def test_bad_tokens(token):
+    with pytest.raises(ValueError):
+        parseRange(token)
+
+
+@pytest.mark.parametrize("board", ["", "2C 7C 9D", "2C 7C 9D 3S"])
+def test_random_range_matches_equity(board):
+    ranges = rangeEquity("AH KH", ["random", "random"], board, 100000, seed=1)
+    spot = equity("AH KH", board, 2, 200000, seed=1)
+    assert abs(ranges["equity"] - spot["equity"]) < 2*(ranges["error"] + spot["error"])
+
+
+@pytest.mark.parametrize("hero, opponents, board, trials", [
+    ["AH KH", ["random"]*25, "", 1000],
+    ["AH KH", [], "", 1000],
+    ["AH KH", ["QQ"], "2C 3C 4D 5D 6S 7S", 1000],
+    ["AH KH", ["QQ"], "2C 2C 3D", 1000],
+    ["AH KH", ["QQ"], "", 0],
+])
+def test_bad_spots(hero, opponents, board, trials):
+    with pytest.raises(ValueError):
+        rangeEquity(hero, opponents, board, trials)